@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Benchmark license filtering: per-repo access_nested_map vs compiled paths.
+
+Replicates the fixture repos to --repos records and times --filters
+license filters done three ways: the original has_license loop over
+access_nested_map, one CompiledPath.extract pass per filter, and lookups
+in GithubOrgClient's prebuilt license index (build time included).
+
+    python3 bench_nested_access.py --repos 10000 --filters 20
+"""
+import argparse
+import time
+from typing import Callable, Dict, List
+from unittest.mock import Mock
+
+from client import GithubOrgClient
+from fixtures import TEST_PAYLOAD
+from utils import access_nested_map, compile_path
+
+LICENSES = ["apache-2.0", "bsd-3-clause", "bsl-1.0", "other", "mit"]
+
+
+def best_of(repeat: int, fn: Callable[[], None]) -> float:
+    """Fastest of ``repeat`` runs of ``fn``, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def has_license(repo: Dict, license_key: str) -> bool:
+    """The original GithubOrgClient.has_license"""
+    try:
+        return access_nested_map(repo, ("license", "key")) == license_key
+    except KeyError:
+        return False
+
+
+def loop(repos: List[Dict], filters: int) -> None:
+    """Filter with has_license, one repo at a time"""
+    for i in range(filters):
+        key = LICENSES[i % len(LICENSES)]
+        [repo["name"] for repo in repos if has_license(repo, key)]
+
+
+def compiled(repos: List[Dict], filters: int) -> None:
+    """Filter with one CompiledPath.extract pass per filter"""
+    path = compile_path("license.key")
+    for i in range(filters):
+        key = LICENSES[i % len(LICENSES)]
+        keys = path.extract(repos)
+        [repo["name"] for repo, k in zip(repos, keys) if k == key]
+
+
+class FixtureClient(GithubOrgClient):
+    """Client whose repos come from the fetcher alone, never the org"""
+    _public_repos_url = "fixture"
+
+
+def indexed(repos: List[Dict], filters: int) -> None:
+    """Filter through a fresh client's license index"""
+    fetcher = Mock()
+    fetcher.fetch_all.return_value = repos
+    client = FixtureClient("google", fetcher)
+    for i in range(filters):
+        client.public_repos(LICENSES[i % len(LICENSES)])
+
+
+def main() -> None:
+    """Time each mode and print it with its speedup over the loop"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repos", type=int, default=10_000)
+    parser.add_argument("--filters", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    fixture = TEST_PAYLOAD[0][1]
+    repos = [fixture[i % len(fixture)] for i in range(args.repos)]
+    baseline = None
+    print("{:<10}{:>10}{:>10}".format("mode", "ms", "speedup"))
+    for name, run in (("loop", loop), ("compiled", compiled),
+                      ("index", indexed)):
+        elapsed = best_of(args.repeat, lambda: run(repos, args.filters))
+        baseline = baseline or elapsed
+        print("{:<10}{:>10.2f}{:>9.1f}x".format(
+            name, elapsed * 1000, baseline / elapsed))
+
+
+if __name__ == "__main__":
+    main()
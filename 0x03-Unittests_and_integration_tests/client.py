@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 """A GitHub org client
 """
-from typing import List, Dict
+from typing import List, Dict, Optional
 
-from utils import get_json, access_nested_map, memoize
+from fetcher import PageFetcher, get_fetcher
+from utils import get_json, compile_path, memoize
+
+LICENSE_KEY = compile_path("license.key")
 
 
 class GithubOrgClient:
@@ -11,9 +14,18 @@ class GithubOrgClient:
     """
     ORG_URL = "https://api.github.com/orgs/{org}"
 
-    def __init__(self, org_name: str) -> None:
+    def __init__(
+        self, org_name: str, fetcher: Optional[PageFetcher] = None
+    ) -> None:
         """Init method of GithubOrgClient"""
         self._org_name = org_name
+        self._fetcher = fetcher
+
+    def refresh(self) -> None:
+        """Forget the memoized org and repos so they are fetched again"""
+        del self.org
+        del self.repos_payload
+        del self.license_index
 
     @memoize
     def org(self) -> Dict:
@@ -27,23 +39,28 @@ class GithubOrgClient:
 
     @memoize
     def repos_payload(self) -> List[Dict]:
-        """Memoize repos payload"""
-        return get_json(self._public_repos_url)
+        """Memoize repos payload, following every page"""
+        fetcher = self._fetcher or get_fetcher()
+        return fetcher.fetch_all(self._public_repos_url)
+
+    @memoize
+    def license_index(self) -> Dict[str, List[str]]:
+        """Memoize repo names by license key, in payload order"""
+        index = {}
+        payload = self.repos_payload
+        keys = LICENSE_KEY.extract(payload)
+        for repo, key in zip(payload, keys):
+            if key is not None:
+                index.setdefault(key, []).append(repo["name"])
+        return index
 
     def public_repos(self, license: str = None) -> List[str]:
         """Public repos"""
-        json_payload = self.repos_payload
-        return [
-            repo["name"]
-            for repo in json_payload
-            if license is None or self.has_license(repo, license)
-        ]
+        if license is not None:
+            return list(self.license_index.get(license, ()))
+        return [repo["name"] for repo in self.repos_payload]
 
     @staticmethod
     def has_license(repo: Dict[str, Dict], license_key: str) -> bool:
         """Static: has_license"""
-        try:
-            return access_nested_map(repo, ("license", "key")) == license_key
-        except KeyError:
-            return False
-        return has_license
+        return LICENSE_KEY.get(repo, None) == license_key
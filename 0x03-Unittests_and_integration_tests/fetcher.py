@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""Paginated, concurrent and conditional fetching of GitHub list endpoints.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import http_client
+from http_client import Timeout
+
+__all__ = [
+    "ETagCache",
+    "PageFetcher",
+    "RateLimitError",
+    "get_fetcher",
+    "parse_link_header",
+]
+
+
+class RateLimitError(Exception):
+    """Raised when the rate limit resets further away than we may wait."""
+
+
+def parse_link_header(header: Any) -> Dict[str, str]:
+    """Parse an RFC 8288 ``Link`` header into ``{rel: url}``.
+    Example
+    -------
+    >>> parse_link_header('<https://x/?page=2>; rel="next"')
+    {'next': 'https://x/?page=2'}
+    """
+    links = {}
+    if not isinstance(header, str):
+        return links
+    for part in header.split(","):
+        url, _, params = part.partition(";")
+        url = url.strip()
+        if not (url.startswith("<") and url.endswith(">")):
+            continue
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "rel":
+                for rel in value.strip('"').split():
+                    links[rel] = url[1:-1]
+    return links
+
+
+def with_page(url: str, page: int) -> str:
+    """Return ``url`` with its ``page`` query parameter set to ``page``."""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k != "page"]
+    query.append(("page", str(page)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def page_number(url: str) -> Optional[int]:
+    """Return the ``page`` query parameter of ``url``, if any."""
+    for key, value in parse_qsl(urlsplit(url).query):
+        if key == "page" and value.isdigit():
+            return int(value)
+    return None
+
+
+class ETagCache:
+    """Persistent on-disk store of ``ETag``, ``Link`` and body per URL.
+
+    One JSON file per URL, replaced atomically, so several processes may
+    share a directory.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """Init method of ETagCache"""
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        """File holding the entry for ``url``"""
+        name = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.directory, name + ".json")
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the cached entry for ``url``, or None"""
+        try:
+            with open(self._path(url)) as cached:
+                return json.load(cached)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, etag: str, link: str, body: Any) -> None:
+        """Store ``body`` and its validators for ``url``"""
+        entry = {"etag": etag, "link": link, "body": body}
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as out:
+            json.dump(entry, out)
+        os.replace(tmp, self._path(url))
+
+
+class PageFetcher:
+    """Fetches every page of a paginated JSON list endpoint.
+
+    The first page is fetched alone. When its ``Link`` header names the
+    ``last`` page, the remaining pages are fetched concurrently, at most
+    ``concurrency`` at a time, over one pooled ``requests.Session``;
+    otherwise ``next`` links are followed one by one. With ``cache_dir``,
+    responses are revalidated with ``If-None-Match`` and a ``304`` reuses
+    the body stored on disk. When rate limited (``429``, or ``403`` with
+    no requests remaining) every worker pauses until ``Retry-After`` or
+    ``X-RateLimit-Reset``, unless that is more than ``max_wait`` seconds
+    away, in which case RateLimitError is raised.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 8,
+        cache_dir: Optional[str] = None,
+        timeout: Timeout = 10.0,
+        max_wait: float = 60.0,
+        max_retries: int = 3,
+        session: Optional[requests.Session] = None,
+    ) -> None:
+        """Init method of PageFetcher"""
+        self.concurrency = concurrency
+        self.cache = ETagCache(cache_dir) if cache_dir else None
+        self.timeout = timeout
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=concurrency, pool_maxsize=concurrency
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "not_modified": 0, "rate_limited": 0}
+
+    def _count(self, name: str) -> None:
+        """Increment one of ``stats``"""
+        with self._lock:
+            self.stats[name] += 1
+
+    def _wait_for_rate_limit(self) -> None:
+        """Sleep while a rate-limit pause is in effect"""
+        delay = self._resume_at - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _rate_limit_delay(self, response: requests.Response) -> float:
+        """Seconds to wait before retrying, or -1 if not rate limited"""
+        headers = response.headers
+        if response.status_code not in (403, 429):
+            return -1
+        if "Retry-After" in headers:
+            return float(headers["Retry-After"])
+        if headers.get("X-RateLimit-Remaining") == "0":
+            reset = float(headers.get("X-RateLimit-Reset", time.time()))
+            return max(reset - time.time(), 0.0)
+        return 60.0 if response.status_code == 429 else -1
+
+    def fetch_page(self, url: str) -> Tuple[Any, Dict[str, str]]:
+        """Fetch one page, returning its JSON body and parsed links"""
+        cached = self.cache.get(url) if self.cache else None
+        headers = {"Accept": "application/vnd.github+json"}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        for _ in range(self.max_retries + 1):
+            self._wait_for_rate_limit()
+            self._count("requests")
+            response = self.session.get(
+                url, headers=headers, timeout=self.timeout
+            )
+            delay = self._rate_limit_delay(response)
+            if delay < 0:
+                break
+            self._count("rate_limited")
+            if delay > self.max_wait:
+                raise RateLimitError(
+                    "{} rate limited for {:.0f}s".format(url, delay)
+                )
+            with self._lock:
+                self._resume_at = max(self._resume_at, time.time() + delay)
+        else:
+            raise RateLimitError("{} still rate limited".format(url))
+        if response.status_code == 304 and cached:
+            self._count("not_modified")
+            return cached["body"], parse_link_header(cached.get("link"))
+        response.raise_for_status()
+        body = response.json()
+        link = response.headers.get("Link")
+        if self.cache and response.headers.get("ETag"):
+            self.cache.put(url, response.headers["ETag"], link, body)
+        return body, parse_link_header(link)
+
+    def fetch_all(self, url: str) -> List[Any]:
+        """Fetch every page starting at ``url`` and concatenate them"""
+        body, links = self.fetch_page(url)
+        if not isinstance(body, list):
+            return body
+        pages = [body]
+        last = page_number(links["last"]) if "last" in links else None
+        if last is not None:
+            first = page_number(url) or 1
+            urls = [with_page(links["last"], n)
+                    for n in range(first + 1, last + 1)]
+            with ThreadPoolExecutor(self.concurrency) as pool:
+                pages.extend(page for page, _ in pool.map(
+                    self.fetch_page, urls))
+        else:
+            while "next" in links:
+                body, links = self.fetch_page(links["next"])
+                pages.append(body)
+        return [item for page in pages for item in page]
+
+    def close(self) -> None:
+        """Close the pooled session"""
+        self.session.close()
+
+
+_default_fetcher = None
+_default_lock = threading.Lock()
+
+
+def get_fetcher() -> PageFetcher:
+    """Return the shared PageFetcher, creating it on first use.
+
+    It sends its requests over the session of http_client's shared
+    JsonClient, so get_json and repos_payload share one connection pool
+    and timeout; http_client.configure() tunes both. ``GITHUB_CACHE_DIR``
+    in the environment enables the on-disk cache.
+    """
+    global _default_fetcher
+    client = http_client.default_client()
+    with _default_lock:
+        if _default_fetcher is None or \
+                _default_fetcher.session is not client.session:
+            _default_fetcher = PageFetcher(
+                cache_dir=os.environ.get("GITHUB_CACHE_DIR"),
+                timeout=client.timeout,
+                session=client.session,
+            )
+        return _default_fetcher
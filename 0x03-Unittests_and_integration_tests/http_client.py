@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""Pooled, caching JSON HTTP client behind utils.get_json.
+"""
+import asyncio
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from json.decoder import WHITESPACE
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+__all__ = [
+    "JsonClient",
+    "configure",
+    "default_client",
+    "parse_cache_control",
+]
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+def parse_cache_control(header: Any) -> Dict[str, Optional[str]]:
+    """Parse a ``Cache-Control`` header into ``{directive: value}``.
+    Example
+    -------
+    >>> parse_cache_control("public, max-age=60")
+    {'public': None, 'max-age': '60'}
+    """
+    directives = {}
+    if not isinstance(header, str):
+        return directives
+    for directive in header.split(","):
+        name, _, value = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+class JsonClient:
+    """Fetches JSON over a pooled ``requests.Session``.
+
+    Up to ``pool_size`` keep-alive connections are kept per host, and
+    every request carries ``timeout`` (connect, read) seconds. Responses
+    are kept in an LRU of ``cache_size`` entries: fresh ones (per
+    ``Cache-Control: max-age``, else ``default_ttl``) are served without a
+    request, stale ones with an ``ETag`` are revalidated with
+    ``If-None-Match``, and ``no-store`` ones are not kept. gzip is
+    negotiated and decoded by the session. Bodies larger than
+    ``stream_threshold`` bytes (or of unknown size) are parsed from the
+    socket, skipping requests' content buffer and charset detection; use
+    iter_json to decode a large array item by item. Like
+    ``requests.get(url).json()``, get_json returns the JSON body of error
+    responses too (GitHub's ``{"message": "Not Found"}``); those are
+    never cached.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        timeout: Timeout = (3.05, 10.0),
+        cache_size: int = 256,
+        default_ttl: float = 0.0,
+        stream_threshold: int = 1 << 20,
+        session: Optional[requests.Session] = None,
+    ) -> None:
+        """Init method of JsonClient"""
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.default_ttl = default_ttl
+        self.stream_threshold = stream_threshold
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=pool_size, pool_maxsize=pool_size
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["Accept-Encoding"] = "gzip, deflate"
+        self.session = session
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1024)
+        self.stats = {"requests": 0, "hits": 0, "revalidated": 0,
+                      "misses": 0}
+
+    def _cached(self, url: str) -> Optional[Dict]:
+        """Return the cache entry for ``url``, marking it recently used"""
+        with self._lock:
+            entry = self._cache.get(url)
+            if entry is not None:
+                self._cache.move_to_end(url)
+            return entry
+
+    def _store(self, url: str, response: requests.Response,
+               body: Any) -> None:
+        """Keep ``body`` if the response allows it"""
+        control = parse_cache_control(response.headers.get("Cache-Control"))
+        etag = response.headers.get("ETag")
+        if "no-store" in control or not self.cache_size:
+            return
+        ttl = self.default_ttl
+        if "no-cache" in control:
+            ttl = 0.0
+        elif (control.get("max-age") or "").isdigit():
+            ttl = float(control["max-age"])
+        if ttl <= 0 and not etag:
+            return
+        entry = {"body": body, "etag": etag,
+                 "expires_at": time.monotonic() + ttl}
+        with self._lock:
+            self._cache[url] = entry
+            self._cache.move_to_end(url)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _count(self, name: str, latency: Optional[float] = None) -> None:
+        """Increment one of ``stats`` and record a request latency"""
+        with self._lock:
+            self.stats[name] += 1
+            if latency is not None:
+                self.stats["requests"] += 1
+                self._latencies.append(latency)
+
+    def _decode(self, response: requests.Response) -> Any:
+        """Decode a JSON body, streaming it if it is large"""
+        length = response.headers.get("Content-Length")
+        if length is not None and int(length) <= self.stream_threshold:
+            return json.loads(response.content)
+        response.raw.decode_content = True
+        return json.load(response.raw)
+
+    def get_json(self, url: str, use_cache: bool = True) -> Any:
+        """Get JSON from ``url``, from the cache when still fresh"""
+        entry = self._cached(url) if use_cache else None
+        headers = {}
+        if entry is not None:
+            if entry["expires_at"] > time.monotonic():
+                self._count("hits")
+                return entry["body"]
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+        start = time.perf_counter()
+        response = self.session.get(
+            url, headers=headers, timeout=self.timeout, stream=True
+        )
+        try:
+            if response.status_code == 304 and entry is not None:
+                self._count("revalidated", time.perf_counter() - start)
+                self._store(url, response, entry["body"])
+                return entry["body"]
+            body = self._decode(response)
+        finally:
+            response.close()
+        self._count("misses", time.perf_counter() - start)
+        if use_cache and response.ok:
+            self._store(url, response, body)
+        return body
+
+    async def get_json_async(self, url: str, use_cache: bool = True) -> Any:
+        """Async variant of get_json sharing the same pool and cache"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(self.get_json, url, use_cache)
+        )
+
+    def iter_json(self, url: str, chunk_size: int = 65536) -> Iterator[Any]:
+        """Yield the items of a top-level JSON array as they arrive.
+
+        Only one chunk and the item being decoded are held in memory, so
+        arbitrarily large arrays can be processed. Not cached; error
+        responses raise requests.HTTPError.
+        """
+        decoder = json.JSONDecoder()
+        start = time.perf_counter()
+        with self.session.get(url, timeout=self.timeout,
+                              stream=True) as response:
+            response.raise_for_status()
+            self._count("misses", time.perf_counter() - start)
+            response.encoding = response.encoding or "utf-8"
+            buffer, pos, started = "", 0, False
+            chunks = response.iter_content(chunk_size, decode_unicode=True)
+            for chunk in chunks:
+                # Drop what was decoded once per chunk, not once per item.
+                buffer, pos = buffer[pos:] + chunk, 0
+                while True:
+                    pos = WHITESPACE.match(buffer, pos).end()
+                    if pos == len(buffer):
+                        break
+                    if not started:
+                        if buffer[pos] != "[":
+                            raise ValueError("{} is not a JSON array"
+                                             .format(url))
+                        pos, started = pos + 1, True
+                        continue
+                    if buffer[pos] == "]":
+                        return
+                    if buffer[pos] == ",":
+                        pos += 1
+                        continue
+                    try:
+                        item, end = decoder.raw_decode(buffer, pos)
+                    except ValueError:
+                        break  # item continues in the next chunk
+                    after = WHITESPACE.match(buffer, end).end()
+                    if after == len(buffer) or buffer[after] not in ",]":
+                        break  # a number may continue in the next chunk
+                    yield item
+                    pos = end
+            raise ValueError("{} ended before the array closed".format(url))
+
+    def invalidate(self, url: Optional[str] = None) -> None:
+        """Drop the cached response for ``url``, or every response"""
+        with self._lock:
+            if url is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(url, None)
+
+    def metrics(self) -> Dict[str, float]:
+        """Hit ratio and request latency percentiles, for monitoring"""
+        with self._lock:
+            stats = dict(self.stats)
+            latencies = sorted(self._latencies)
+        lookups = stats["hits"] + stats["revalidated"] + stats["misses"]
+        stats["hit_ratio"] = (
+            (stats["hits"] + stats["revalidated"]) / lookups
+            if lookups else 0.0
+        )
+        for label, q in (("p50_ms", 0.5), ("p95_ms", 0.95),
+                         ("p99_ms", 0.99)):
+            index = min(int(q * len(latencies)), len(latencies) - 1)
+            stats[label] = latencies[index] * 1000 if latencies else 0.0
+        return stats
+
+    def close(self) -> None:
+        """Close the pooled session"""
+        self.session.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def default_client() -> JsonClient:
+    """Return the shared JsonClient, creating it on first use"""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = JsonClient()
+        return _default_client
+
+
+def configure(**options: Any) -> JsonClient:
+    """Replace the shared JsonClient (see JsonClient for ``options``)"""
+    global _default_client
+    with _default_lock:
+        if _default_client is not None:
+            _default_client.close()
+        _default_client = JsonClient(**options)
+        return _default_client
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Local stub of the GitHub API serving fixtures, for integration tests.
+"""
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qsl, urlsplit
+
+
+class StubGitHub:
+    """Serves ``/orgs/<org>`` and a paginated ``/orgs/<org>/repos``.
+
+    Repo pages carry ``Link`` and ``ETag`` headers like the real API and
+    answer ``If-None-Match`` with ``304``. Set ``rate_limited`` to make the
+    next requests fail with ``429`` and ``Retry-After: retry_after``.
+    """
+
+    def __init__(
+        self, org_payload: Dict, repos_payload: List[Dict], per_page: int = 3
+    ) -> None:
+        """Init method of StubGitHub"""
+        self.org_payload = org_payload
+        self.repos_payload = repos_payload
+        self.per_page = per_page
+        self.rate_limited = 0
+        self.retry_after = 0
+        self.requests = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running server"""
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self) -> "StubGitHub":
+        """Start serving in a background thread"""
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _respond(self, handler: BaseHTTPRequestHandler) -> None:
+        """Answer one GET request"""
+        parts = urlsplit(handler.path)
+        query = dict(parse_qsl(parts.query))
+        self.requests.append(handler.path)
+        if self.rate_limited:
+            self.rate_limited -= 1
+            handler.send_response(429)
+            handler.send_header("Retry-After", str(self.retry_after))
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return
+        headers = {}
+        path = parts.path.rstrip("/").split("/")
+        if len(path) == 3 and path[1] == "orgs":
+            payload = dict(self.org_payload)
+            payload["repos_url"] = "{}/orgs/{}/repos".format(
+                self.url, path[2])
+        elif len(path) == 4 and path[3] == "repos":
+            page = int(query.get("page", 1))
+            per_page = int(query.get("per_page", self.per_page))
+            last = max(1, -(-len(self.repos_payload) // per_page))
+            payload = self.repos_payload[(page - 1) * per_page:
+                                         page * per_page]
+            base = "{}{}?per_page={}&page=".format(
+                self.url, parts.path, per_page)
+            links = []
+            if page < last:
+                links.append('<{}{}>; rel="next"'.format(base, page + 1))
+            links.append('<{}{}>; rel="last"'.format(base, last))
+            headers["Link"] = ", ".join(links)
+        else:
+            body = json.dumps({"message": "Not Found"}).encode()
+            handler.send_response(404)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+            return
+        body = json.dumps(payload).encode()
+        etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+        headers["ETag"] = etag
+        if handler.headers.get("If-None-Match") == etag:
+            handler.send_response(304)
+            body = b""
+        else:
+            handler.send_response(200)
+            headers["Content-Type"] = "application/json"
+        headers["Content-Length"] = str(len(body))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _handler(self) -> type:
+        """Request handler class bound to this stub"""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Delegates GET requests to the stub"""
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                """Handle GET"""
+                stub._respond(self)
+
+            def log_message(self, *args) -> None:
+                """Keep test output quiet"""
+
+        return Handler
@@ -2,13 +2,16 @@
 """Unit and integration tests for client.py
 """
 
+import tempfile
 import unittest
 from parameterized import parameterized, parameterized_class
 from unittest.mock import patch, Mock, PropertyMock
 from typing import Dict
 
 from client import GithubOrgClient
+from fetcher import PageFetcher
 from fixtures import TEST_PAYLOAD
+from stub_server import StubGitHub
 
 
 class TestGithubOrgClient(unittest.TestCase):
@@ -38,10 +41,10 @@ class TestGithubOrgClient(unittest.TestCase):
             client = GithubOrgClient("google")
             self.assertEqual(client._public_repos_url, expected_url)
 
-    @patch('client.get_json')
-    def test_public_repos(self, mock_get_json: Mock) -> None:
+    def test_public_repos(self) -> None:
         """Test public_repos returns all repos"""
-        mock_get_json.return_value = [
+        fetcher = Mock()
+        fetcher.fetch_all.return_value = [
             {"name": "repo1", "license": {"key": "mit"}},
             {"name": "repo2", "license": {"key": "apache-2.0"}},
             {"name": "repo3"}
@@ -52,19 +55,19 @@ class TestGithubOrgClient(unittest.TestCase):
             new_callable=PropertyMock
         ) as mock_url:
             mock_url.return_value = "https://api.github.com/orgs/google/repos"
-            client = GithubOrgClient("google")
+            client = GithubOrgClient("google", fetcher)
             self.assertEqual(
                 client.public_repos(), ["repo1", "repo2", "repo3"]
             )
-            mock_get_json.assert_called_once_with(
+            fetcher.fetch_all.assert_called_once_with(
                 "https://api.github.com/orgs/google/repos"
             )
             mock_url.assert_called()
 
-    @patch('client.get_json')
-    def test_public_repos_with_license(self, mock_get_json: Mock) -> None:
+    def test_public_repos_with_license(self) -> None:
         """Test public_repos returns repos filtered by license"""
-        mock_get_json.return_value = [
+        fetcher = Mock()
+        fetcher.fetch_all.return_value = [
             {"name": "repo1", "license": {"key": "mit"}},
             {"name": "repo2", "license": {"key": "apache-2.0"}},
             {"name": "repo3"}
@@ -75,10 +78,33 @@ class TestGithubOrgClient(unittest.TestCase):
             new_callable=PropertyMock
         ) as mock_url:
             mock_url.return_value = "https://api.github.com/orgs/google/repos"
-            client = GithubOrgClient("google")
+            client = GithubOrgClient("google", fetcher)
             self.assertEqual(client.public_repos("mit"), ["repo1"])
             self.assertEqual(client.public_repos("apache-2.0"), ["repo2"])
 
+    def test_license_index(self) -> None:
+        """Test license filters are served from an index built once"""
+        fetcher = Mock()
+        fetcher.fetch_all.return_value = [
+            {"name": "repo1", "license": {"key": "mit"}},
+            {"name": "repo2", "license": None},
+            {"name": "repo3", "license": {"key": "mit"}}
+        ]
+        with patch.object(
+            GithubOrgClient,
+            '_public_repos_url',
+            new_callable=PropertyMock
+        ):
+            client = GithubOrgClient("google", fetcher)
+            self.assertEqual(client.license_index, {"mit": ["repo1", "repo3"]})
+            client.public_repos("mit").append("mutated")
+            self.assertEqual(client.public_repos("mit"), ["repo1", "repo3"])
+            self.assertEqual(client.public_repos("gpl"), [])
+            fetcher.fetch_all.assert_called_once()
+            client.refresh()
+            client.public_repos("mit")
+            self.assertEqual(fetcher.fetch_all.call_count, 2)
+
     @parameterized.expand([
         ({"license": {"key": "my_license"}}, "my_license", True),
         ({"license": {"key": "other_license"}}, "my_license", False)
@@ -104,33 +130,50 @@ class TestIntegrationGithubOrgClient(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls) -> None:
-        """Patch requests.get and set up side effect"""
-        cls.get_patcher = patch('requests.get')
-
-        def side_effect(url):
-            mock = Mock()
-            if url == cls.org_payload["repos_url"]:
-                mock.json.return_value = cls.repos_payload
-            else:
-                mock.json.return_value = cls.org_payload
-            return mock
-
-        cls.get_patcher.start().side_effect = side_effect
+        """Serve the fixtures from a local stub of the GitHub API"""
+        cls.server = StubGitHub(cls.org_payload, cls.repos_payload).start()
+        cls.org_patcher = patch.object(
+            GithubOrgClient, "ORG_URL", cls.server.url + "/orgs/{org}"
+        )
+        cls.org_patcher.start()
 
     @classmethod
     def tearDownClass(cls) -> None:
-        """Stop patcher"""
-        cls.get_patcher.stop()
+        """Stop the patcher and the stub server"""
+        cls.org_patcher.stop()
+        cls.server.stop()
+
+    def setUp(self) -> None:
+        """Use a fresh fetcher with its own on-disk cache"""
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.fetcher = PageFetcher(
+            concurrency=4, cache_dir=self.cache_dir.name
+        )
+
+    def tearDown(self) -> None:
+        """Close the fetcher and drop its cache"""
+        self.fetcher.close()
+        self.cache_dir.cleanup()
 
     def test_public_repos(self) -> None:
-        """Test public_repos returns expected repos"""
-        client = GithubOrgClient("google")
+        """Test public_repos returns expected repos across every page"""
+        client = GithubOrgClient("google", self.fetcher)
         self.assertEqual(client.public_repos(), self.expected_repos)
         self.assertEqual(
             client.public_repos(license="apache-2.0"),
             self.apache2_repos
         )
 
+    def test_public_repos_revalidates_with_etag(self) -> None:
+        """Test a second client reuses cached pages on 304 Not Modified"""
+        GithubOrgClient("google", self.fetcher).public_repos()
+        fetcher = PageFetcher(cache_dir=self.cache_dir.name)
+        client = GithubOrgClient("google", fetcher)
+        self.assertEqual(client.public_repos(), self.expected_repos)
+        pages = -(-len(self.repos_payload) // self.server.per_page)
+        self.assertEqual(fetcher.stats["not_modified"], pages)
+        fetcher.close()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Unit and integration tests for fetcher.py
+"""
+
+import tempfile
+import unittest
+from parameterized import parameterized
+from typing import Dict
+
+import http_client
+from fetcher import (
+    PageFetcher, RateLimitError, get_fetcher, parse_link_header
+)
+from fixtures import TEST_PAYLOAD
+from stub_server import StubGitHub
+
+
+class TestParseLinkHeader(unittest.TestCase):
+    """Test parse_link_header function"""
+
+    @parameterized.expand([
+        ('<https://x/r?page=2>; rel="next"', {"next": "https://x/r?page=2"}),
+        (
+            '<https://x/r?page=2>; rel="next", <https://x/r?page=5>; '
+            'rel="last"',
+            {"next": "https://x/r?page=2", "last": "https://x/r?page=5"}
+        ),
+        ("", {}),
+        (None, {}),
+    ])
+    def test_parse_link_header(self, header: str, expected: Dict) -> None:
+        """Test that Link headers map each rel to its URL"""
+        self.assertEqual(parse_link_header(header), expected)
+
+
+class TestPageFetcher(unittest.TestCase):
+    """Integration tests for PageFetcher against the stub server"""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Serve the fixture repos, three per page"""
+        org_payload, cls.repos_payload = TEST_PAYLOAD[0][:2]
+        cls.server = StubGitHub(org_payload, cls.repos_payload).start()
+        cls.repos_url = cls.server.url + "/orgs/google/repos"
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Stop the stub server"""
+        cls.server.stop()
+
+    def setUp(self) -> None:
+        """Use a fresh fetcher with its own on-disk cache"""
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.fetcher = PageFetcher(
+            concurrency=4, cache_dir=self.cache_dir.name, max_wait=1
+        )
+
+    def tearDown(self) -> None:
+        """Close the fetcher and drop its cache"""
+        self.server.rate_limited = 0
+        self.server.retry_after = 0
+        self.fetcher.close()
+        self.cache_dir.cleanup()
+
+    @parameterized.expand([(1,), (2,), (4,), (100,)])
+    def test_fetch_all_pages_in_order(self, per_page: int) -> None:
+        """Test every page is fetched and concatenated in order"""
+        url = "{}?per_page={}".format(self.repos_url, per_page)
+        self.assertEqual(self.fetcher.fetch_all(url), self.repos_payload)
+        pages = -(-len(self.repos_payload) // per_page)
+        self.assertEqual(self.fetcher.stats["requests"], pages)
+
+    def test_conditional_requests(self) -> None:
+        """Test cached pages are revalidated and reused on 304"""
+        first = self.fetcher.fetch_all(self.repos_url)
+        second = self.fetcher.fetch_all(self.repos_url)
+        self.assertEqual(first, second)
+        self.assertEqual(self.fetcher.stats["not_modified"], 3)
+
+    def test_retries_after_rate_limit(self) -> None:
+        """Test a 429 with a short Retry-After is waited out"""
+        self.server.rate_limited = 1
+        self.assertEqual(
+            self.fetcher.fetch_all(self.repos_url), self.repos_payload
+        )
+        self.assertEqual(self.fetcher.stats["rate_limited"], 1)
+
+    def test_gives_up_on_long_rate_limit(self) -> None:
+        """Test a reset beyond max_wait raises RateLimitError"""
+        self.server.rate_limited = 1
+        self.server.retry_after = 3600
+        with self.assertRaises(RateLimitError):
+            self.fetcher.fetch_all(self.repos_url)
+
+
+class TestGetFetcher(unittest.TestCase):
+    """Test the shared PageFetcher"""
+
+    def test_shares_json_client_session(self) -> None:
+        """Test get_fetcher uses http_client's session and follows it"""
+        client = http_client.configure(timeout=(1, 2))
+        fetcher = get_fetcher()
+        self.assertIs(fetcher.session, client.session)
+        self.assertEqual(fetcher.timeout, (1, 2))
+        self.assertIs(get_fetcher(), fetcher)
+        client = http_client.configure()
+        self.assertIs(get_fetcher().session, client.session)
+
+
+if __name__ == '__main__':
+    unittest.main()
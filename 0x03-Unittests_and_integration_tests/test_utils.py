@@ -2,14 +2,23 @@
 """Unit tests for utils.py
 """
 
+import asyncio
+import json
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from parameterized import parameterized
-from unittest.mock import patch, Mock
+from types import MappingProxyType
+from unittest.mock import patch, MagicMock, Mock
 from typing import Dict, Any, Tuple
 
+import http_client
 from client import GithubOrgClient
-from utils import access_nested_map, get_json, memoize
+from http_client import JsonClient
+from utils import access_nested_map, compile_path, get_json, memoize
 from fixtures import TEST_PAYLOAD
+from stub_server import StubGitHub
 
 
 class TestAccessNestedMap(unittest.TestCase):
@@ -47,6 +56,77 @@ class TestAccessNestedMap(unittest.TestCase):
             self.assertIn(path[-1], exception_msg)
 
 
+class TestCompiledPath(unittest.TestCase):
+    """Test CompiledPath and compile_path"""
+
+    @parameterized.expand([
+        ({"a": 1}, ("a",), 1),
+        ({"a": {"b": 2}}, ("a",), {"b": 2}),
+        ({"a": {"b": 2}}, ("a", "b"), 2),
+        ({"a": {"b": {"c": 3}}}, "a.b.c", 3),
+        ([{"a": 1}, {"b": 2}, {"a": 3}], "*.a", [1, 3]),
+        ({"x": {"a": [{"b": 1}, {"b": 2}]}}, "x.a.*.b", [1, 2]),
+    ])
+    def test_get(self, nested_map: Any, path: Any, expected: Any) -> None:
+        """Test that get matches access_nested_map and expands wildcards"""
+        self.assertEqual(compile_path(path).get(nested_map), expected)
+
+    @parameterized.expand([
+        ({}, ("a",)),
+        ({"a": 1}, ("a", "b")),
+        ({"a": {"b": None}}, ("a", "b", "c")),
+    ])
+    def test_get_exception(
+        self,
+        nested_map: Dict[str, Any],
+        path: Tuple[str, ...]
+    ) -> None:
+        """Test that get raises KeyError naming the missing key"""
+        with self.assertRaises(KeyError) as cm:
+            compile_path(path).get(nested_map)
+        self.assertIn(path[-1], str(cm.exception))
+        self.assertIsNone(compile_path(path).get(nested_map, None))
+
+    @parameterized.expand([
+        ({"a": 1}, ("a",)),
+        ({"a": {"b": 2}}, ("a", "b")),
+        ({"a": {"b": {"c": 3}}}, ("a", "b", "c")),
+        ({"a": [1, 2]}, ("a", 0)),
+        ({"a": "xyz"}, ("a", 0)),
+        ({"a": {"b": [3]}}, ("a", "b", 0)),
+        ([{"a": 1}], (0,)),
+        ([{"a": 1}], (0, "a")),
+        (MappingProxyType({"a": {"b": 2}}), ("a", "b")),
+        ({"a": None}, ("a", "b")),
+        ({}, ("a",)),
+    ])
+    def test_parity_with_access_nested_map(
+        self,
+        nested_map: Any,
+        path: Tuple[Any, ...]
+    ) -> None:
+        """Test get returns or raises exactly what access_nested_map does"""
+        try:
+            expected = access_nested_map(nested_map, path)
+        except KeyError as exc:
+            with self.assertRaises(KeyError) as cm:
+                compile_path(path).get(nested_map)
+            self.assertEqual(cm.exception.args, exc.args)
+        else:
+            self.assertEqual(compile_path(path).get(nested_map), expected)
+
+    def test_extract(self) -> None:
+        """Test extract returns one value per record, default if missing"""
+        repos = TEST_PAYLOAD[0][1]
+        expected = [
+            repo["license"]["key"] if repo.get("license") else "none"
+            for repo in repos
+        ]
+        self.assertEqual(
+            compile_path("license.key").extract(repos, "none"), expected
+        )
+
+
 class TestGetJson(unittest.TestCase):
     """Test get_json function"""
 
@@ -60,16 +140,102 @@ class TestGetJson(unittest.TestCase):
         test_payload: Dict[str, bool]
     ) -> None:
         """Test that get_json returns the expected result"""
-        mock_response = Mock()
-        mock_response.json.return_value = test_payload
+        content = json.dumps(test_payload).encode()
+        mock_response = Mock(status_code=200, content=content)
+        mock_response.headers = {"Content-Length": str(len(content))}
 
-        with patch('requests.get') as mock_get:
+        client = http_client.configure()
+        with patch.object(client.session, 'get') as mock_get:
             mock_get.return_value = mock_response
             result = get_json(test_url)
-            mock_get.assert_called_once_with(test_url)
+            mock_get.assert_called_once()
+            self.assertEqual(mock_get.call_args[0], (test_url,))
             self.assertEqual(result, test_payload)
 
 
+class TestJsonClient(unittest.TestCase):
+    """Integration tests for JsonClient against the stub server"""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Serve the fixture repos"""
+        org_payload, cls.repos_payload = TEST_PAYLOAD[0][:2]
+        cls.server = StubGitHub(org_payload, cls.repos_payload).start()
+        cls.url = cls.server.url + "/orgs/google/repos?per_page=100"
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Stop the stub server"""
+        cls.server.stop()
+
+    @parameterized.expand([
+        ("fresh", 60, {"hits": 1, "revalidated": 0, "misses": 1}),
+        ("revalidated", 0, {"hits": 0, "revalidated": 1, "misses": 1}),
+    ])
+    def test_cache(self, _: str, ttl: float, expected: Dict) -> None:
+        """Test fresh responses are reused and stale ones revalidated"""
+        client = JsonClient(default_ttl=ttl)
+        self.assertEqual(client.get_json(self.url), self.repos_payload)
+        self.assertEqual(client.get_json(self.url), self.repos_payload)
+        metrics = client.metrics()
+        self.assertEqual(
+            {name: metrics[name] for name in expected}, expected
+        )
+        self.assertEqual(metrics["hit_ratio"], 0.5)
+        client.close()
+
+    @parameterized.expand([(0,), (1 << 20,)])
+    def test_large_bodies(self, threshold: int) -> None:
+        """Test bodies parse the same whether streamed or buffered"""
+        client = JsonClient(stream_threshold=threshold)
+        self.assertEqual(
+            client.get_json(self.url, use_cache=False), self.repos_payload
+        )
+        client.close()
+
+    @parameterized.expand([(7,), (4096,), (65536,)])
+    def test_iter_json(self, chunk_size: int) -> None:
+        """Test array items are decoded incrementally across chunks"""
+        client = JsonClient()
+        self.assertEqual(
+            list(client.iter_json(self.url, chunk_size)), self.repos_payload
+        )
+        client.close()
+
+    @parameterized.expand([(1,), (3,), (5,), (64,)])
+    def test_iter_json_chunk_boundaries(self, chunk_size: int) -> None:
+        """Test numbers, strings and whitespace split across chunks"""
+        text = ' \n[ 12345 , "a, ]b" ,\t{"c": [1, 2]} , -0.5e3,true ]\n'
+        response = MagicMock(encoding="utf-8")
+        response.__enter__.return_value = response
+        response.iter_content.return_value = [
+            text[i:i + chunk_size] for i in range(0, len(text), chunk_size)
+        ]
+        client = JsonClient()
+        with patch.object(client.session, "get", return_value=response):
+            self.assertEqual(
+                list(client.iter_json(self.url)),
+                [12345, "a, ]b", {"c": [1, 2]}, -500.0, True]
+            )
+        client.close()
+
+    def test_error_body_returned_not_cached(self) -> None:
+        """Test error responses return their JSON body and are not kept"""
+        client = JsonClient(default_ttl=60)
+        url = self.server.url + "/nothing/here"
+        for _ in range(2):
+            self.assertEqual(client.get_json(url), {"message": "Not Found"})
+        self.assertEqual(client.metrics()["misses"], 2)
+        client.close()
+
+    def test_get_json_async(self) -> None:
+        """Test the async variant returns the same payload"""
+        client = JsonClient()
+        result = asyncio.run(client.get_json_async(self.url))
+        self.assertEqual(result, self.repos_payload)
+        client.close()
+
+
 class TestMemoize(unittest.TestCase):
     """Test memoize decorator"""
 
@@ -95,6 +261,107 @@ class TestMemoize(unittest.TestCase):
             self.assertEqual(result2, 42)
             mock_a_method.assert_called_once()
 
+    def test_memoize_single_flight(self) -> None:
+        """Test racing threads on a cold property compute it once"""
+        calls = []
+
+        class TestClass:
+            @memoize
+            def a_property(self):
+                calls.append(1)
+                time.sleep(0.05)
+                return 42
+
+        test_instance = TestClass()
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(
+                lambda _: test_instance.a_property, range(8)))
+        self.assertEqual(results, [42] * 8)
+        self.assertEqual(len(calls), 1)
+
+    def test_memoize_invalidation_during_computation(self) -> None:
+        """Test a value computed before del is not kept after it"""
+        started, release = threading.Event(), threading.Event()
+        values = iter(range(10))
+
+        class TestClass:
+            @memoize
+            def a_property(self):
+                value = next(values)
+                started.set()
+                release.wait(5)
+                return value
+
+        test_instance = TestClass()
+        with ThreadPoolExecutor(1) as pool:
+            stale = pool.submit(lambda: test_instance.a_property)
+            started.wait(5)
+            del test_instance.a_property
+            release.set()
+            self.assertEqual(stale.result(), 0)
+        self.assertEqual(test_instance.a_property, 1)
+        self.assertEqual(test_instance.a_property, 1)
+
+    def test_memoize_invalidation(self) -> None:
+        """Test del, refresh and ttl make the property recompute"""
+        values = iter(range(10))
+
+        class TestClass:
+            @memoize(ttl=0.05)
+            def a_property(self):
+                return next(values)
+
+        test_instance = TestClass()
+        self.assertEqual(test_instance.a_property, 0)
+        self.assertEqual(test_instance.a_property, 0)
+        del test_instance.a_property
+        self.assertEqual(test_instance.a_property, 1)
+        self.assertEqual(TestClass.a_property.refresh(test_instance), 2)
+        time.sleep(0.06)
+        self.assertEqual(test_instance.a_property, 3)
+        with self.assertRaises(AttributeError):
+            test_instance.a_property = 4
+
+    def test_memoize_method_with_arguments(self) -> None:
+        """Test methods with arguments are memoized in a bounded LRU"""
+        calls = []
+
+        class TestClass:
+            @memoize(maxsize=2)
+            def square(self, x):
+                calls.append(x)
+                return x * x
+
+        test_instance = TestClass()
+        self.assertEqual(
+            [test_instance.square(x) for x in (2, 3, 2, 4, 3)],
+            [4, 9, 4, 16, 9]
+        )
+        self.assertEqual(calls, [2, 3, 4, 3])
+        test_instance.square.cache_clear()
+        test_instance.square(2)
+        self.assertEqual(calls, [2, 3, 4, 3, 2])
+
+    def test_memoize_async(self) -> None:
+        """Test concurrent awaits of a coroutine property share one call"""
+        calls = []
+
+        class TestClass:
+            @memoize
+            async def a_property(self):
+                calls.append(1)
+                await asyncio.sleep(0.01)
+                return 42
+
+        async def main(test_instance):
+            return await asyncio.gather(
+                *(test_instance.a_property for _ in range(5)))
+
+        test_instance = TestClass()
+        self.assertEqual(asyncio.run(main(test_instance)), [42] * 5)
+        self.assertEqual(asyncio.run(main(test_instance)), [42] * 5)
+        self.assertEqual(len(calls), 1)
+
 
 if __name__ == '__main__':
     unittest.main()
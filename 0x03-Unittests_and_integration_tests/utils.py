@@ -1,19 +1,34 @@
 #!/usr/bin/env python3
 """Generic utilities for github org client.
 """
-import requests
-from functools import wraps
+import asyncio
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache, partial, wraps
 from typing import (
     Mapping,
     Sequence,
     Any,
     Dict,
     Callable,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Union,
 )
 
+import http_client
+
 __all__ = [
+    "CompiledPath",
     "access_nested_map",
+    "compile_path",
     "get_json",
+    "get_json_async",
     "memoize",
 ]
 
@@ -40,15 +55,337 @@ def access_nested_map(nested_map: Mapping, path: Sequence) -> Any:
     return nested_map
 
 
-def get_json(url: str) -> Dict:
+_MISSING = object()
+
+
+class CompiledPath:
+    """A key path parsed once and applied to many nested maps.
+    ``path`` is a sequence of keys or a dotted string. A ``*`` key fans
+    out over every value of a mapping or item of a sequence, collecting
+    the matches (branches missing the rest of the path are skipped)
+    into a list.
+    Example
+    -------
+    >>> CompiledPath("license.key").get({"license": {"key": "mit"}})
+    'mit'
+    >>> CompiledPath("*.license.key").get([{"license": {"key": "mit"}}, {}])
+    ['mit']
+    """
+
+    def __init__(self, path: Union[str, Sequence]) -> None:
+        """Init method of CompiledPath"""
+        keys = path.split(".") if isinstance(path, str) else list(path)
+        self.keys = tuple(keys)
+        if "*" in keys:
+            split = keys.index("*")
+            head = CompiledPath(keys[:split]) if split else None
+            tail = CompiledPath(keys[split + 1:])
+            self._get = partial(self._fan_out, head, tail)
+        else:
+            self._get = self._specialize(self.keys)
+
+    def __repr__(self) -> str:
+        """CompiledPath('a.b')"""
+        return "CompiledPath({!r})".format(".".join(map(str, self.keys)))
+
+    @staticmethod
+    def _specialize(keys: tuple) -> Callable[[Any], Any]:
+        """Build a getter for a path without wildcards.
+        Like access_nested_map, every step must be a Mapping; the exact
+        type check spares plain dicts the slower ABC check.
+        """
+        if not keys:
+            return lambda nested_map: nested_map
+        if len(keys) == 2:
+            first, second = keys
+
+            def pair(nested_map: Any) -> Any:
+                """Follow two keys"""
+                if type(nested_map) is not dict \
+                        and not isinstance(nested_map, Mapping):
+                    raise KeyError(first)
+                nested_map = nested_map[first]
+                if type(nested_map) is not dict \
+                        and not isinstance(nested_map, Mapping):
+                    raise KeyError(second)
+                return nested_map[second]
+
+            return pair
+
+        def walk(nested_map: Any) -> Any:
+            """Follow every key in turn"""
+            for key in keys:
+                if type(nested_map) is not dict \
+                        and not isinstance(nested_map, Mapping):
+                    raise KeyError(key)
+                nested_map = nested_map[key]
+            return nested_map
+
+        return walk
+
+    @staticmethod
+    def _fan_out(head: Optional["CompiledPath"], tail: "CompiledPath",
+                 nested_map: Any) -> List:
+        """Apply ``tail`` below every child of ``head``'s value"""
+        if head is not None:
+            nested_map = head.get(nested_map)
+        if isinstance(nested_map, Mapping):
+            children = nested_map.values()
+        elif isinstance(nested_map, (list, tuple)):
+            children = nested_map
+        else:
+            raise KeyError("*")
+        found = []
+        for child in children:
+            try:
+                found.append(tail.get(child))
+            except KeyError:
+                pass
+        return found
+
+    def get(self, nested_map: Any, default: Any = _MISSING) -> Any:
+        """Value at the path, like access_nested_map.
+        Raises KeyError when the path is missing, unless ``default`` is
+        given.
+        """
+        try:
+            return self._get(nested_map)
+        except (KeyError, TypeError, IndexError):
+            if default is not _MISSING:
+                return default
+            raise KeyError(self._missing_key(nested_map)) from None
+
+    def _missing_key(self, nested_map: Any) -> Any:
+        """First key of the path that cannot be followed"""
+        for key in self.keys:
+            if key == "*" or not isinstance(nested_map, Mapping) \
+                    or key not in nested_map:
+                return key
+            nested_map = nested_map[key]
+        return self.keys[-1] if self.keys else None
+
+    def extract(self, records: Iterable, default: Any = None) -> List:
+        """Value at the path in each record, ``default`` where missing"""
+        getter = self._get
+        values = []
+        append = values.append
+        for record in records:
+            try:
+                append(getter(record))
+            except (KeyError, TypeError, IndexError):
+                append(default)
+        return values
+
+
+@lru_cache(maxsize=256)
+def compile_path(path: Union[str, tuple]) -> CompiledPath:
+    """Return the (cached) CompiledPath for ``path``."""
+    return CompiledPath(path)
+
+
+def get_json(url: str, use_cache: bool = True) -> Dict:
     """Get JSON from remote URL.
+    Goes through the shared http_client.JsonClient: a pooled keep-alive
+    session with timeouts and a response cache honouring Cache-Control
+    and ETag. Tune it with http_client.configure(); see its metrics().
+    """
+    return http_client.default_client().get_json(url, use_cache)
+
+
+async def get_json_async(url: str, use_cache: bool = True) -> Dict:
+    """Get JSON from remote URL without blocking the event loop.
     """
-    response = requests.get(url)
-    return response.json()
+    return await http_client.default_client().get_json_async(url, use_cache)
+
+
+class _Memo:
+    """One instance's memoized results for one method, keyed by arguments.
+
+    Keeps at most ``maxsize`` results (None for unbounded), each for
+    ``ttl`` seconds (None for ever). Concurrent callers missing the same
+    key wait for the first caller's result instead of computing it again.
+    Invalidating a key also forgets its computation in flight, whose
+    result then goes to its callers but is not kept.
+    """
+
+    def __init__(self, maxsize: Optional[int], ttl: Optional[float]) -> None:
+        """Init method of _Memo"""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.in_flight = {}
+        self.lock = threading.Lock()
 
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the result for ``key``, computing it at most once"""
+        entry = self.entries.get(key)
+        if entry is not None and (entry[1] is None
+                                  or entry[1] > time.monotonic()):
+            if self.maxsize is not None:
+                with self.lock:
+                    if key in self.entries:
+                        self.entries.move_to_end(key)
+            return entry[0]
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and (entry[1] is None
+                                      or entry[1] > time.monotonic()):
+                return entry[0]
+            flight = self.in_flight.get(key)
+            owner = flight is None
+            if owner:
+                flight = self.in_flight[key] = Future()
+        if not owner:
+            return flight.result()
+        try:
+            value = compute()
+        except BaseException as exc:
+            with self.lock:
+                if self.in_flight.get(key) is flight:
+                    del self.in_flight[key]
+            flight.set_exception(exc)
+            raise
+        expires_at = None
+        if self.ttl is not None:
+            expires_at = time.monotonic() + self.ttl
+        with self.lock:
+            # Not ours any more if the key was invalidated meanwhile.
+            if self.in_flight.get(key) is flight:
+                del self.in_flight[key]
+                self.entries[key] = (value, expires_at)
+                self.entries.move_to_end(key)
+                if self.maxsize is not None:
+                    while len(self.entries) > self.maxsize:
+                        self.entries.popitem(last=False)
+        flight.set_result(value)
+        return value
 
-def memoize(fn: Callable) -> Callable:
+    def discard(self, key: Hashable) -> None:
+        """Forget the result for ``key``, and any computation of it"""
+        with self.lock:
+            self.entries.pop(key, None)
+            self.in_flight.pop(key, None)
+
+    def clear(self) -> None:
+        """Forget every result and computation in flight"""
+        with self.lock:
+            self.entries.clear()
+            self.in_flight.clear()
+
+
+class _Memoized:
+    """Descriptor behind memoize; one _Memo per instance."""
+
+    def __init__(self, fn: Callable, maxsize: Optional[int],
+                 ttl: Optional[float]) -> None:
+        """Init method of _Memoized"""
+        wraps(fn)(self)
+        self.fn = fn
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.is_async = inspect.iscoroutinefunction(fn)
+        self.attr_name = "_memo_{}".format(fn.__name__)
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        """Key the per-instance storage on the attribute name"""
+        self.attr_name = "_memo_{}".format(name)
+
+    def memo(self, obj: Any) -> _Memo:
+        """Return ``obj``'s _Memo, creating it on first use"""
+        memo = obj.__dict__.get(self.attr_name)
+        if memo is None:
+            # setdefault is atomic, so racing threads share one _Memo.
+            memo = obj.__dict__.setdefault(
+                self.attr_name, _Memo(self.maxsize, self.ttl))
+        return memo
+
+    def call(self, obj: Any, args: tuple, kwargs: Dict) -> Any:
+        """Memoized ``fn(obj, *args, **kwargs)``"""
+        key = args + tuple(sorted(kwargs.items())) if kwargs else args
+        memo = self.memo(obj)
+        if not self.is_async:
+            return memo.get(key, lambda: self.fn(obj, *args, **kwargs))
+
+        async def shared() -> Any:
+            """Await the one task computing this key on this loop"""
+            task = memo.get(key, start)
+            if task.done():
+                return task.result()
+            if task.get_loop() is not asyncio.get_running_loop():
+                # Still pending on another event loop: compute it here.
+                memo.discard(key)
+                task = memo.get(key, start)
+            return await asyncio.shield(task)
+
+        def start() -> asyncio.Task:
+            """Start computing ``key``; failures are not kept"""
+            task = asyncio.ensure_future(self.fn(obj, *args, **kwargs))
+
+            def forget_failure(done: asyncio.Task) -> None:
+                """Let the next caller retry a failed computation"""
+                if done.cancelled() or done.exception() is not None:
+                    memo.discard(key)
+
+            task.add_done_callback(forget_failure)
+            return task
+
+        return shared()
+
+    def invalidate(self, obj: Any) -> None:
+        """Forget every result memoized for ``obj``"""
+        self.memo(obj).clear()
+
+
+class _MemoizedProperty(_Memoized):
+    """Read-only memoized property; ``del obj.attr`` forgets its value."""
+
+    def __get__(self, obj: Any, owner: type = None) -> Any:
+        """Return the memoized value"""
+        if obj is None:
+            return self
+        return self.call(obj, (), {})
+
+    def __delete__(self, obj: Any) -> None:
+        """Forget the memoized value"""
+        self.invalidate(obj)
+
+    def refresh(self, obj: Any) -> Any:
+        """Recompute and return the value for ``obj``"""
+        self.invalidate(obj)
+        return self.__get__(obj)
+
+
+class _MemoizedMethod(_Memoized):
+    """Memoized method with arguments, bounded per instance."""
+
+    def __get__(self, obj: Any, owner: type = None) -> Callable:
+        """Return the bound memoized method"""
+        if obj is None:
+            return self
+
+        @wraps(self.fn)
+        def bound(*args: Any, **kwargs: Any) -> Any:
+            """Memoized call"""
+            return self.call(obj, args, kwargs)
+
+        bound.cache_clear = lambda: self.invalidate(obj)
+        return bound
+
+
+def memoize(
+    fn: Optional[Callable] = None,
+    *,
+    ttl: Optional[float] = None,
+    maxsize: Optional[int] = 128,
+) -> Callable:
     """Decorator to memoize a method.
+    A method taking only ``self`` becomes a read-only property computed
+    once per instance, even when threads race on a cold value. ``del
+    obj.attr`` (or ``Class.attr.refresh(obj)``) forgets it. A method with
+    arguments stays a method whose results are kept per instance in an
+    LRU of ``maxsize`` entries; ``obj.method.cache_clear()`` empties it.
+    With ``ttl``, results expire after that many seconds. Coroutine
+    methods memoize their result too: ``await obj.attr``.
     Example
     -------
     class MyClass:
@@ -63,14 +400,8 @@ def memoize(fn: Callable) -> Callable:
     >>> my_object.a_method
     42
     """
-    attr_name = "_{}".format(fn.__name__)
-
-    @wraps(fn)
-    def memoized(self):
-        """"memoized wraps"""
-        if not hasattr(self, attr_name):
-            setattr(self, attr_name, fn(self))
-        return getattr(self, attr_name)
-
-    return property(memoized)
-
+    if fn is None:
+        return partial(memoize, ttl=ttl, maxsize=maxsize)
+    if len(inspect.signature(fn).parameters) > 1:
+        return _MemoizedMethod(fn, maxsize, ttl)
+    return _MemoizedProperty(fn, None, ttl)
@@ -1,9 +1,14 @@
 # messaging_app/chats/filters.py
 
+from uuid import UUID
+
 import django_filters
+from django.db.models import Value
+from django.db.models.functions import Upper
 from django.utils.translation import gettext_lazy as _
 
-from .models import Message, User
+from .models import Message
+from .search import get_search_backend
 
 
 class MessageFilter(django_filters.FilterSet):
@@ -14,9 +19,8 @@ class MessageFilter(django_filters.FilterSet):
     - Search within message content
     """
 
-    sender = django_filters.ModelChoiceFilter(
+    sender = django_filters.CharFilter(
         field_name="sender",
-        queryset=User.objects.all(),
         label=_("Sender (ID or username)"),
         method="filter_sender",
     )
@@ -34,9 +38,8 @@ class MessageFilter(django_filters.FilterSet):
     )
 
     search = django_filters.CharFilter(
-        field_name="message_body",
-        lookup_expr="icontains",
         label=_("Search in messages"),
+        method="filter_search",
     )
 
     class Meta:
@@ -56,9 +59,20 @@ class MessageFilter(django_filters.FilterSet):
             return queryset
 
         try:
-            # Try to convert to integer for ID lookup
-            sender_id = int(value)
-            return queryset.filter(sender__id=sender_id)
-        except (ValueError, TypeError):
-            # Fall back to username lookup
-            return queryset.filter(sender__username__iexact=str(value))
+            # Try to parse a UUID for ID lookup
+            return queryset.filter(sender_id=UUID(str(value)))
+        except ValueError:
+            # Fall back to a case-insensitive username lookup, spelled as
+            # UPPER(username) = UPPER(value) on every backend so that
+            # user_username_upper_idx serves it. The database uppercases
+            # both sides: its UPPER need not agree with str.upper()
+            # (SQLite's only folds ASCII; Python turns "ß" into "SS").
+            queryset = queryset.alias(sender_username_upper=Upper("sender__username"))
+            return queryset.filter(sender_username_upper=Upper(Value(str(value))))
+
+    def filter_search(self, queryset, name, value):
+        """
+        Filter messages containing every word of the search, each as a
+        prefix, through the full-text index
+        """
+        return get_search_backend(queryset.db).filter(queryset, value)
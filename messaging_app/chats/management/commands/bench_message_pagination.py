@@ -0,0 +1,106 @@
+# chats/management/commands/bench_message_pagination.py
+import time
+import uuid
+from datetime import timedelta
+
+from chats.models import Conversation, Message
+from chats.pagination import MessagePagination
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+User = get_user_model()
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        "Times fetching message pages at increasing depths with OFFSET "
+        "pagination and with MessagePagination's cursors. Runs in a "
+        "transaction that is rolled back, so no data is kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=200_000)
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def seed(self, total):
+        suffix = uuid.uuid4().hex[:8]
+        users = [
+            User.objects.create_user(
+                username=f"bench-{name}-{suffix}",
+                email=f"bench-{name}-{suffix}@example.com",
+                first_name=name.title(),
+                last_name="Bench",
+                role="guest",
+            )
+            for name in ("sender", "reader")
+        ]
+        conversation = Conversation.objects.create()
+        conversation.participants.add(*users)
+        start = timezone.now() - timedelta(seconds=total)
+        # Two messages per second, so cursors have to break ties on message_id.
+        Message.objects.bulk_create(
+            (
+                Message(
+                    sender=users[i % 2],
+                    conversation=conversation,
+                    message_body=f"message {i}",
+                    sent_at=start + timedelta(seconds=i // 2),
+                )
+                for i in range(total)
+            ),
+            batch_size=5000,
+        )
+        return conversation
+
+    def run(self, options):
+        page_size = options["page_size"]
+        conversation = self.seed(options["messages"])
+        queryset = Message.objects.filter(conversation=conversation).order_by(
+            "-sent_at", "-message_id"
+        )
+        factory = APIRequestFactory()
+        paginator = MessagePagination()
+        last_page = options["messages"] // page_size
+        depths = [d for d in (1, 10, 100, 1000, 10_000) if d <= last_page]
+
+        self.stdout.write(f"{'page':>8}{'offset ms':>12}{'cursor ms':>12}")
+        for depth in depths:
+            offset = (depth - 1) * page_size
+
+            def by_offset():
+                queryset.count()
+                list(queryset[offset : offset + page_size])
+
+            url = f"/messages/?page_size={page_size}"
+            if offset:
+                # The cursor the previous page's next link would carry.
+                url = paginator.encode_cursor(
+                    queryset[offset - 1], reverse=False, base_url=url
+                )
+            request = Request(factory.get(url, HTTP_HOST="localhost"))
+
+            def by_cursor():
+                paginator.paginate_queryset(queryset, request)
+
+            offset_ms = best_of(options["repeat"], by_offset) * 1000
+            cursor_ms = best_of(options["repeat"], by_cursor) * 1000
+            self.stdout.write(f"{depth:>8}{offset_ms:>12.2f}{cursor_ms:>12.2f}")
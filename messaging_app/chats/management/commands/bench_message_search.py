@@ -0,0 +1,98 @@
+# chats/management/commands/bench_message_search.py
+import random
+import time
+import uuid
+
+from chats.models import Conversation, Message
+from chats.search import get_search_backend
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+User = get_user_model()
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        "Times searching message bodies with icontains and with the "
+        "database's full-text search backend. Runs in a transaction that "
+        "is rolled back, so no data is kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=200_000)
+        parser.add_argument("--vocabulary", type=int, default=20_000)
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def seed(self, total, vocabulary):
+        suffix = uuid.uuid4().hex[:8]
+        sender = User.objects.create_user(
+            username=f"bench-search-{suffix}",
+            email=f"bench-search-{suffix}@example.com",
+            first_name="Search",
+            last_name="Bench",
+            role="guest",
+        )
+        conversation = Conversation.objects.create()
+        conversation.participants.add(sender)
+        # Word frequencies fall off roughly as in natural text (Zipf).
+        words = [f"w{uuid.uuid4().hex[:6]}" for _ in range(vocabulary)]
+        weights = [1 / rank for rank in range(1, vocabulary + 1)]
+        rng = random.Random(0)
+        Message.objects.bulk_create(
+            (
+                Message(
+                    sender=sender,
+                    conversation=conversation,
+                    message_body=" ".join(rng.choices(words, weights, k=12)),
+                )
+                for _ in range(total)
+            ),
+            batch_size=5000,
+        )
+        return words
+
+    def run(self, options):
+        words = self.seed(options["messages"], options["vocabulary"])
+        backend = get_search_backend()
+        # bulk_create sends no signals; the inverted index needs filling.
+        backend.rebuild(Message)
+        limit = options["limit"]
+        queries = {
+            "common": words[0],
+            "rare": words[-1],
+            "prefix": words[len(words) // 2][:5],
+            "two words": f"{words[1]} {words[10]}",
+        }
+
+        self.stdout.write(f"backend: {type(backend).__name__}")
+        self.stdout.write(f"{'query':>10}{'icontains ms':>15}{'search ms':>12}")
+        for label, query in queries.items():
+
+            def by_icontains():
+                queryset = Message.objects.all()
+                for term in query.split():
+                    queryset = queryset.filter(message_body__icontains=term)
+                list(queryset.order_by("-sent_at")[:limit])
+
+            def by_search():
+                list(backend.search(Message.objects.all(), query)[:limit])
+
+            icontains_ms = best_of(options["repeat"], by_icontains) * 1000
+            search_ms = best_of(options["repeat"], by_search) * 1000
+            self.stdout.write(f"{label:>10}{icontains_ms:>15.2f}{search_ms:>12.2f}")
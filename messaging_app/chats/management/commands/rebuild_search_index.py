@@ -0,0 +1,17 @@
+# chats/management/commands/rebuild_search_index.py
+from chats.models import Message
+from chats.search import get_search_backend
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Reindexes every message for full-text search. Needed after "
+        "bulk_create() or update() on messages with the inverted-index "
+        "backend, and after SQLite migrations that remake the messages table."
+    )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend(Message.objects.db)
+        backend.rebuild(Message)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {type(backend).__name__} index"))
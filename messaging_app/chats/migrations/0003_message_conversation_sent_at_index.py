@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0002_rename_id_conversation_conversation_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'sent_at', 'message_id'], name='message_conv_sent_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:56
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+PARTICIPANT_INDEX = "conv_participant_user_idx"
+
+
+def participant_columns(apps):
+    through = apps.get_model("chats", "Conversation").participants.through
+    return (
+        through._meta.db_table,
+        through._meta.get_field("user").column,
+        through._meta.get_field("conversation").column,
+    )
+
+
+def add_participant_index(apps, schema_editor):
+    # The auto-created participants table has no Meta to declare indexes on.
+    # (user, conversation) lets "conversations of user X" be answered from
+    # the index alone; the unique (conversation, user) index only serves
+    # lookups that start from the conversation.
+    table, user, conversation = participant_columns(apps)
+    qn = schema_editor.quote_name
+    schema_editor.execute(
+        f"CREATE INDEX {qn(PARTICIPANT_INDEX)} ON {qn(table)} "
+        f"({qn(user)}, {qn(conversation)})"
+    )
+
+
+def remove_participant_index(apps, schema_editor):
+    table, _, _ = participant_columns(apps)
+    qn = schema_editor.quote_name
+    sql = f"DROP INDEX {qn(PARTICIPANT_INDEX)}"
+    if schema_editor.connection.vendor == "mysql":
+        sql += f" ON {qn(table)}"
+    schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0003_message_conversation_sent_at_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Upper('username'), name='user_username_upper_idx'),
+        ),
+        migrations.RunPython(add_participant_index, remove_participant_index),
+    ]
@@ -0,0 +1,136 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:00
+
+import re
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Search structures as of this migration, spelled out here rather than
+# read from chats.search so that later changes there cannot alter what
+# this migration does. Must match the search backends of the time.
+PG_INDEX = "message_body_search_idx"
+PG_CONFIG = "simple"
+
+FTS_STATEMENTS = [
+    "CREATE TABLE chats_message_fts_docid ("
+    "docid INTEGER PRIMARY KEY, message_id char(32) NOT NULL UNIQUE)",
+    "CREATE VIRTUAL TABLE chats_message_fts USING fts5("
+    "message_id UNINDEXED, message_body, "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER chats_message_fts_insert AFTER INSERT ON chats_message "
+    "BEGIN "
+    "INSERT INTO chats_message_fts_docid(message_id) VALUES (new.message_id); "
+    "INSERT INTO chats_message_fts(rowid, message_id, message_body) VALUES ("
+    "(SELECT docid FROM chats_message_fts_docid "
+    "WHERE message_id = new.message_id), new.message_id, new.message_body); "
+    "END",
+    "CREATE TRIGGER chats_message_fts_delete AFTER DELETE ON chats_message "
+    "BEGIN "
+    "DELETE FROM chats_message_fts WHERE rowid = ("
+    "SELECT docid FROM chats_message_fts_docid "
+    "WHERE message_id = old.message_id); "
+    "DELETE FROM chats_message_fts_docid WHERE message_id = old.message_id; "
+    "END",
+    "CREATE TRIGGER chats_message_fts_update "
+    "AFTER UPDATE OF message_body ON chats_message "
+    "BEGIN "
+    "UPDATE chats_message_fts SET message_body = new.message_body "
+    "WHERE rowid = (SELECT docid FROM chats_message_fts_docid "
+    "WHERE message_id = new.message_id); "
+    "END",
+    "INSERT INTO chats_message_fts_docid(message_id) "
+    "SELECT message_id FROM chats_message",
+    "INSERT INTO chats_message_fts(rowid, message_id, message_body) "
+    "SELECT d.docid, m.message_id, m.message_body FROM chats_message m "
+    "JOIN chats_message_fts_docid d ON d.message_id = m.message_id",
+]
+FTS_DROP_STATEMENTS = [
+    "DROP TRIGGER chats_message_fts_insert",
+    "DROP TRIGGER chats_message_fts_delete",
+    "DROP TRIGGER chats_message_fts_update",
+    "DROP TABLE chats_message_fts",
+    "DROP TABLE chats_message_fts_docid",
+]
+
+WORD = re.compile(r"[^\W_]+")
+TERM_LENGTH = 64
+
+
+def pg_index():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    return GinIndex(SearchVector("message_body", config=PG_CONFIG), name=PG_INDEX)
+
+
+def fill_message_terms(apps, schema_editor):
+    Message = apps.get_model("chats", "Message")
+    MessageTerm = apps.get_model("chats", "MessageTerm")
+    batch = []
+    for message in Message.objects.only("pk", "message_body").iterator(chunk_size=2000):
+        words = WORD.findall(message.message_body.lower())
+        counts = Counter(word[:TERM_LENGTH] for word in words)
+        batch.extend(
+            MessageTerm(message_id=message.pk, term=term, occurrences=occurrences)
+            for term, occurrences in counts.items()
+        )
+        if len(batch) >= 2000:
+            MessageTerm.objects.bulk_create(batch)
+            batch = []
+    MessageTerm.objects.bulk_create(batch)
+
+
+def install_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.add_index(apps.get_model("chats", "Message"), pg_index())
+    elif vendor == "sqlite":
+        for sql in FTS_STATEMENTS:
+            schema_editor.execute(sql)
+    else:
+        fill_message_terms(apps, schema_editor)
+
+
+def uninstall_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.remove_index(apps.get_model("chats", "Message"), pg_index())
+    elif vendor == "sqlite":
+        for sql in FTS_DROP_STATEMENTS:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0004_user_username_upper_and_participant_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('occurrences', models.PositiveIntegerField(default=1)),
+                ('message', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='chats.message')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='messageterm',
+            constraint=models.UniqueConstraint(fields=('term', 'message'), name='message_term_unique'),
+        ),
+        migrations.CreateModel(
+            name='MessageSearchDocument',
+            fields=[
+                ('message', models.OneToOneField(on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='fts_document', serialize=False, to='chats.message')),
+                ('message_body', models.TextField()),
+            ],
+            options={
+                'db_table': 'chats_message_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(install_search, uninstall_search),
+    ]
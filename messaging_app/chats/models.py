@@ -8,6 +8,7 @@ import uuid
 
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils import timezone
 
 
@@ -67,10 +68,29 @@ class User(AbstractUser):
     USERNAME_FIELD = "username"
     REQUIRED_FIELDS = ["first_name", "last_name"]
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Case-insensitive username lookups (MessageFilter.filter_sender)
+            # compare UPPER(username), which a plain index cannot serve.
+            models.Index(Upper("username"), name="user_username_upper_idx"),
+        ]
+
     def __str__(self):
         return f"{self.email} ({self.role})"
 
 
+class ConversationQuerySet(models.QuerySet):
+    def with_last_message_id(self):
+        """
+        Annotate each conversation with the pk of its latest message, found
+        by one index seek per conversation instead of loading its history.
+        """
+        latest = Message.objects.filter(conversation=models.OuterRef("pk")).order_by(
+            "-sent_at", "-message_id"
+        )
+        return self.annotate(last_message_id=models.Subquery(latest.values("pk")[:1]))
+
+
 class Conversation(models.Model):
     """Representation of a conversation between two or more users"""
 
@@ -80,6 +100,8 @@ class Conversation(models.Model):
     participants = models.ManyToManyField(User, related_name="conversations")
     created_at = models.DateField(default=timezone.now)
 
+    objects = ConversationQuerySet.as_manager()
+
     def __str__(self):
         return f"Conversation {self.conversation_id}"
 
@@ -99,5 +121,60 @@ class Message(models.Model):
     message_body = models.TextField(null=False)
     sent_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            # Serves MessagePagination's (sent_at, message_id) keyset in
+            # either direction within a conversation.
+            models.Index(
+                fields=["conversation", "sent_at", "message_id"],
+                name="message_conv_sent_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"Message from {self.sender.email} at {self.sent_at}"
+
+
+class MessageTerm(models.Model):
+    """
+    A posting of the inverted index that chats.search falls back to on
+    databases without full-text indexes: a word of a message and how
+    often it occurs there.
+    """
+
+    term = models.CharField(max_length=64)
+    message = models.ForeignKey(
+        Message, on_delete=models.CASCADE, related_name="search_terms"
+    )
+    occurrences = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            # Also the index that prefix lookups range-scan on term.
+            models.UniqueConstraint(
+                fields=["term", "message"], name="message_term_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.term} in {self.message_id}"
+
+
+class MessageSearchDocument(models.Model):
+    """
+    A row of the SQLite FTS5 table that chats.search keeps in step with
+    messages, mapped only so that searches can join it to rank with bm25.
+    The table exists on SQLite alone and is never written through the ORM.
+    """
+
+    message = models.OneToOneField(
+        Message,
+        primary_key=True,
+        on_delete=models.DO_NOTHING,
+        related_name="fts_document",
+    )
+    message_body = models.TextField()
+
+    class Meta:
+        managed = False
+        db_table = "chats_message_fts"
@@ -1,29 +1,166 @@
 # massaging_app/chats/pagination.py
 
-from rest_framework.pagination import PageNumberPagination
+import base64
+import hashlib
+import json
+from collections import namedtuple
+from datetime import datetime
+from uuid import UUID
+
+from django.core.cache import cache
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+Cursor = namedtuple("Cursor", ["sent_at", "message_id", "reverse"])
 
 
-class MessagePagination(PageNumberPagination):
+class MessagePagination(BasePagination):
     """
-    Custom pagination class for messages with 20 items per page.
-    Includes next and previous page links in the response.
+    Cursor pagination for messages with 20 items per page.
+
+    Pages are keyed on (sent_at, message_id), so fetching any page costs
+    the same however deep into the history it is; there is no OFFSET
+    scan and no page numbers. The cursors in the next and previous links
+    are opaque. Pass ``ordering=sent_at`` for oldest first.
+
+    ``count`` is served from the cache for ``count_cache_timeout``
+    seconds (``count_mode = "cached"``); use "exact" to count on every
+    request or "none" to leave it out.
     """
 
     page_size = 20
     page_size_query_param = "page_size"
     max_page_size = 100
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+    count_mode = "cached"
+    count_cache_timeout = 60
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            return Cursor(
+                datetime.fromisoformat(data["t"]), UUID(data["id"]), bool(data["r"])
+            )
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, message, reverse, base_url=None):
+        data = {
+            "t": message.sent_at.isoformat(),
+            "id": str(message.pk),
+            "r": int(reverse),
+        }
+        token = base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+        return replace_query_param(
+            base_url or self.base_url, self.cursor_query_param, token.rstrip("=")
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.count = self.get_count(queryset)
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor.reverse)
+
+        # A previous page is read backwards from its cursor, then flipped.
+        descending = request.query_params.get(self.ordering_query_param) != "sent_at"
+        if reverse:
+            descending = not descending
+        if descending:
+            queryset = queryset.order_by("-sent_at", "-message_id")
+            before, after = "lt", "lte"
+        else:
+            queryset = queryset.order_by("sent_at", "message_id")
+            before, after = "gt", "gte"
+        if cursor:
+            # The redundant sent_at bound lets the (conversation, sent_at)
+            # index narrow the range before the tie-break on message_id.
+            queryset = queryset.filter(
+                Q(**{f"sent_at__{after}": cursor.sent_at}),
+                Q(**{f"sent_at__{before}": cursor.sent_at})
+                | Q(**{f"message_id__{before}": cursor.message_id}),
+            )
+
+        rows = list(queryset[: page_size + 1])
+        has_more = len(rows) > page_size
+        self.page = rows[:page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        return self.page
+
+    def get_count(self, queryset):
+        if self.count_mode == "none":
+            return None
+        if self.count_mode == "exact":
+            return queryset.count()
+        query = str(queryset.order_by().query)
+        key = "message-count:" + hashlib.md5(query.encode()).hexdigest()
+        return cache.get_or_set(key, queryset.count, self.count_cache_timeout)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
 
     def get_paginated_response(self, data):
-        return Response(
-            {
+        body = {
+            "links": {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+            },
+            "results": data,
+        }
+        if self.count is not None:
+            body["count"] = self.count
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
                 "links": {
-                    "next": self.get_next_link(),
-                    "previous": self.get_previous_link(),
+                    "type": "object",
+                    "properties": {
+                        "next": {
+                            "type": "string",
+                            "nullable": True,
+                            "format": "uri",
+                        },
+                        "previous": {
+                            "type": "string",
+                            "nullable": True,
+                            "format": "uri",
+                        },
+                    },
                 },
-                "count": self.page.paginator.count,
-                "total_pages": self.page.paginator.num_pages,
-                "current_page": self.page.number,
-                "results": data,
-            }
-        )
+                "count": {"type": "integer"},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,304 @@
+# messaging_app/chats/search.py
+
+"""
+Full-text search over message bodies.
+
+A query matches messages containing every one of its words, each as a
+prefix ("depl" finds "deploy"). Backends are chosen by database vendor:
+a GIN-indexed tsvector on PostgreSQL, an FTS5 table on SQLite and an
+inverted index (MessageTerm) anywhere else, notably MySQL. Set
+``CHATS_SEARCH_BACKEND`` to the dotted path of a SearchBackend subclass
+to use another one.
+"""
+
+import re
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import BooleanField, FloatField, OuterRef, Q, Subquery, Sum
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+BACKENDS = {
+    "postgresql": "chats.search.PostgresSearchBackend",
+    "sqlite": "chats.search.SQLiteSearchBackend",
+}
+FALLBACK_BACKEND = "chats.search.InvertedIndexSearchBackend"
+
+MAX_QUERY_TERMS = 8
+WORD = re.compile(r"[^\W_]+")
+
+
+def words(text):
+    """Lowercased words of text, in order, the way every backend splits them"""
+    return WORD.findall(text.lower())
+
+
+def query_terms(query):
+    """Distinct words of a search query, at most MAX_QUERY_TERMS of them"""
+    return list(dict.fromkeys(words(query)))[:MAX_QUERY_TERMS]
+
+
+class SearchBackend:
+    """
+    Base class for message search backends.
+
+    ``filter`` narrows a message queryset to the matches and leaves its
+    ordering alone; ``search`` also annotates ``search_rank`` (higher is
+    better) and orders by it. The index must follow deletes by itself;
+    ``update`` is called after every save.
+    """
+
+    def update(self, message):
+        """Reindex a message that was just created or edited"""
+
+    def rebuild(self, model):
+        """Reindex every message, e.g. after bulk_create or update()"""
+
+    def filter(self, queryset, query):
+        """Messages of queryset matching every term of query"""
+        raise NotImplementedError
+
+    def search(self, queryset, query):
+        """Messages of queryset matching query, best match first"""
+        raise NotImplementedError
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    Matches ``to_tsvector(message_body)`` against a prefix tsquery, served
+    by a GIN index on that same expression, so PostgreSQL keeps it current
+    on every write. The "simple" configuration neither stems nor drops
+    stop words, which suits short chat messages in any language.
+    """
+
+    # Must match the GIN index created by migration 0005.
+    config = "simple"
+
+    def vector(self):
+        from django.contrib.postgres.search import SearchVector
+
+        return SearchVector("message_body", config=self.config)
+
+    def tsquery(self, terms):
+        from django.contrib.postgres.search import SearchQuery
+
+        raw = " & ".join(f"{term}:*" for term in terms)
+        return SearchQuery(raw, config=self.config, search_type="raw")
+
+    def filter(self, queryset, query):
+        terms = query_terms(query)
+        if not terms:
+            return queryset.none()
+        return queryset.alias(search_document=self.vector()).filter(
+            search_document=self.tsquery(terms)
+        )
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import SearchRank
+
+        terms = query_terms(query)
+        if not terms:
+            return queryset.none()
+        rank = SearchRank(self.vector(), self.tsquery(terms))
+        return (
+            self.filter(queryset, query)
+            .annotate(search_rank=rank)
+            .order_by("-search_rank", "-sent_at")
+        )
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """
+    An FTS5 table over message_body, ranked with bm25, that stores each
+    message's message_id as an UNINDEXED column.
+
+    Message rowids are not stable (VACUUM and Django's table remakes
+    renumber them), so nothing is keyed on them. Each message instead
+    gets a docid, an INTEGER PRIMARY KEY in chats_message_fts_docid, which
+    the triggers use to find its FTS row on edit and delete.
+
+    SQLite migrations that remake the messages table drop its triggers;
+    ``manage.py rebuild_search_index`` puts them back.
+    """
+
+    table = "chats_message_fts"
+    docids = "chats_message_fts_docid"
+    tokenize = "unicode61 remove_diacritics 2"
+
+    def statements(self, model):
+        fts, docids = self.table, self.docids
+        source = model._meta.db_table
+        pk = model._meta.pk.column
+        body = model._meta.get_field("message_body").column
+        docid = f"(SELECT docid FROM {docids} WHERE message_id = {{}}.{pk})"
+        return [
+            f"CREATE TABLE IF NOT EXISTS {docids} ("
+            f"docid INTEGER PRIMARY KEY, message_id char(32) NOT NULL UNIQUE)",
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"message_id UNINDEXED, message_body, tokenize='{self.tokenize}')",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {source} "
+            f"BEGIN "
+            f"INSERT INTO {docids}(message_id) VALUES (new.{pk}); "
+            f"INSERT INTO {fts}(rowid, message_id, message_body) "
+            f"VALUES ({docid.format('new')}, new.{pk}, new.{body}); "
+            f"END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {source} "
+            f"BEGIN "
+            f"DELETE FROM {fts} WHERE rowid = {docid.format('old')}; "
+            f"DELETE FROM {docids} WHERE message_id = old.{pk}; "
+            f"END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_update "
+            f"AFTER UPDATE OF {body} ON {source} "
+            f"BEGIN "
+            f"UPDATE {fts} SET message_body = new.{body} "
+            f"WHERE rowid = {docid.format('new')}; "
+            f"END",
+        ]
+
+    def rebuild(self, model):
+        fts, docids = self.table, self.docids
+        source = model._meta.db_table
+        pk = model._meta.pk.column
+        body = model._meta.get_field("message_body").column
+        with transaction.atomic(using=model.objects.db):
+            with connections[model.objects.db].cursor() as cursor:
+                for sql in self.statements(model):
+                    cursor.execute(sql)
+                cursor.execute(f"DELETE FROM {fts}")
+                cursor.execute(f"DELETE FROM {docids}")
+                cursor.execute(
+                    f"INSERT INTO {docids}(message_id) SELECT {pk} FROM {source}"
+                )
+                cursor.execute(
+                    f"INSERT INTO {fts}(rowid, message_id, message_body) "
+                    f"SELECT d.docid, m.{pk}, m.{body} FROM {source} m "
+                    f"JOIN {docids} d ON d.message_id = m.{pk}"
+                )
+
+    def match(self, terms):
+        return " AND ".join(f'"{term}"*' for term in terms)
+
+    def filter(self, queryset, query):
+        terms = query_terms(query)
+        if not terms:
+            return queryset.none()
+        matches = RawSQL(
+            f"SELECT message_id FROM {self.table} WHERE {self.table} MATCH %s",
+            (self.match(terms),),
+        )
+        return queryset.filter(pk__in=matches)
+
+    def search(self, queryset, query):
+        terms = query_terms(query)
+        if not terms:
+            return queryset.none()
+        # bm25() is only defined within the MATCH, so the FTS table is joined
+        # in (through MessageSearchDocument) rather than queried once per row;
+        # lower bm25 scores are better.
+        fts = self.table
+        match = RawSQL(
+            f"{fts} MATCH %s", (self.match(terms),), output_field=BooleanField()
+        )
+        rank = RawSQL(f"-bm25({fts})", (), output_field=FloatField())
+        return (
+            queryset.filter(fts_document__isnull=False)
+            .filter(match)
+            .annotate(search_rank=rank)
+            .order_by("-search_rank", "-sent_at")
+        )
+
+
+class InvertedIndexSearchBackend(SearchBackend):
+    """
+    Postings in MessageTerm: one row per distinct word of each message,
+    with its number of occurrences. Prefixes are range scans on the
+    (term, message) unique index, and a message ranks by the occurrences
+    of the words it matched.
+
+    Postings are rewritten on save and deleted with their message by the
+    foreign key's cascade. bulk_create() and update() send no signals;
+    run ``manage.py rebuild_search_index`` after using them.
+    """
+
+    batch_size = 2000
+
+    def term_model(self, model):
+        return model._meta.apps.get_model("chats", "MessageTerm")
+
+    def postings(self, term_model, message):
+        max_length = term_model._meta.get_field("term").max_length
+        counts = Counter(word[:max_length] for word in words(message.message_body))
+        return [
+            term_model(message_id=message.pk, term=term, occurrences=occurrences)
+            for term, occurrences in counts.items()
+        ]
+
+    def update(self, message):
+        term_model = self.term_model(type(message))
+        with transaction.atomic(using=message._state.db):
+            term_model.objects.filter(message_id=message.pk).delete()
+            term_model.objects.bulk_create(self.postings(term_model, message))
+
+    def rebuild(self, model):
+        term_model = self.term_model(model)
+        with transaction.atomic(using=model.objects.db):
+            term_model.objects.all().delete()
+            batch = []
+            messages = model.objects.only("pk", "message_body")
+            for message in messages.iterator(chunk_size=self.batch_size):
+                batch.extend(self.postings(term_model, message))
+                if len(batch) >= self.batch_size:
+                    term_model.objects.bulk_create(batch)
+                    batch = []
+            term_model.objects.bulk_create(batch)
+
+    def query_terms(self, term_model, query):
+        """Query terms cut to the stored length, so long words still match"""
+        max_length = term_model._meta.get_field("term").max_length
+        return list(dict.fromkeys(term[:max_length] for term in query_terms(query)))
+
+    def filter(self, queryset, query):
+        term_model = self.term_model(queryset.model)
+        terms = self.query_terms(term_model, query)
+        if not terms:
+            return queryset.none()
+        for term in terms:
+            matches = term_model.objects.filter(term__startswith=term)
+            queryset = queryset.filter(pk__in=matches.values("message_id"))
+        return queryset
+
+    def search(self, queryset, query):
+        term_model = self.term_model(queryset.model)
+        terms = self.query_terms(term_model, query)
+        if not terms:
+            return queryset.none()
+        any_term = Q()
+        for term in terms:
+            any_term |= Q(term__startswith=term)
+        occurrences = (
+            term_model.objects.filter(any_term, message_id=OuterRef("pk"))
+            .values("message_id")
+            .annotate(total=Sum("occurrences"))
+            .values("total")
+        )
+        return (
+            self.filter(queryset, query)
+            .annotate(search_rank=Subquery(occurrences))
+            .order_by("-search_rank", "-sent_at")
+        )
+
+
+@lru_cache(maxsize=None)
+def load_backend(path):
+    return import_string(path)()
+
+
+def get_search_backend(using=DEFAULT_DB_ALIAS):
+    """The search backend for the database alias ``using``"""
+    path = getattr(settings, "CHATS_SEARCH_BACKEND", None)
+    if not path:
+        path = BACKENDS.get(connections[using].vendor, FALLBACK_BACKEND)
+    return load_backend(path)
@@ -5,10 +5,12 @@ Serializers for User, Conversation, and Message models
 """
 
 from django.contrib.auth import get_user_model
+from django.urls import reverse
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 from .models import Conversation, Message
+from .pagination import MessagePagination
 
 User = get_user_model()
 
@@ -16,7 +18,7 @@ User = get_user_model()
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for User model"""
 
-    user_id = serializers.UUIDField(source="id", read_only=True)
+    user_id = serializers.UUIDField(source="pk", read_only=True)
     first_name = serializers.CharField()
     last_name = serializers.CharField()
     email = serializers.CharField()
@@ -74,7 +76,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 class MessageSerializer(serializers.ModelSerializer):
     """Serializer for Message model"""
 
-    message_id = serializers.UUIDField(source="id", read_only=True)
+    message_id = serializers.UUIDField(source="pk", read_only=True)
     sender = UserSerializer(read_only=True)
     message_body = serializers.CharField()
 
@@ -84,8 +86,34 @@ class MessageSerializer(serializers.ModelSerializer):
         read_only_fields = ["message_id", "sent_at", "sender"]
 
 
+class ConversationInboxSerializer(serializers.ListSerializer):
+    """
+    Resolves the last message of every listed conversation in one query,
+    rather than one query (or a prefetched full history) per conversation.
+    """
+
+    def to_representation(self, data):
+        conversations = list(data.all() if hasattr(data, "all") else data)
+        missing = [c.pk for c in conversations if not hasattr(c, "last_message_id")]
+        if missing:
+            last_ids = dict(
+                Conversation.objects.filter(pk__in=missing)
+                .with_last_message_id()
+                .values_list("pk", "last_message_id")
+            )
+            for conversation in conversations:
+                if conversation.pk in last_ids:
+                    conversation.last_message_id = last_ids[conversation.pk]
+        messages = Message.objects.select_related("sender").in_bulk(
+            [c.last_message_id for c in conversations if c.last_message_id]
+        )
+        for conversation in conversations:
+            conversation.last_message = messages.get(conversation.last_message_id)
+        return super().to_representation(conversations)
+
+
 class ConversationListSerializer(serializers.ModelSerializer):
-    conversation_id = serializers.UUIDField(source="id", read_only=True)
+    conversation_id = serializers.UUIDField(source="pk", read_only=True)
     participants = UserSerializer(many=True, read_only=True)
     last_message = serializers.SerializerMethodField()
 
@@ -93,20 +121,48 @@ class ConversationListSerializer(serializers.ModelSerializer):
         model = Conversation
         fields = ["conversation_id", "participants", "created_at", "last_message"]
         read_only_fields = ["conversation_id", "created_at"]
+        list_serializer_class = ConversationInboxSerializer
 
     def get_last_message(self, obj):
-        last_message = obj.messages.order_by("-sent_at").first()
+        if hasattr(obj, "last_message"):
+            last_message = obj.last_message
+        else:
+            last_message = obj.messages.order_by("-sent_at", "-message_id").first()
         if last_message:
             return MessageSerializer(last_message).data
         return None
 
 
+class ConversationMessageSerializer(serializers.ModelSerializer):
+    """Compact message embedded in a conversation; senders are in participants"""
+
+    message_id = serializers.UUIDField(source="pk", read_only=True)
+    sender_id = serializers.UUIDField(read_only=True)
+
+    class Meta:
+        model = Message
+        fields = ["message_id", "sender_id", "message_body", "sent_at"]
+        read_only_fields = fields
+
+
 class ConversationDetailSerializer(serializers.ModelSerializer):
-    """Serializer for Conversation model with nested participants and messages"""
+    """
+    Serializer for Conversation model with nested participants and the most
+    recent messages.
+
+    Only the latest ``recent_messages`` messages are embedded, newest first,
+    with a link to the rest on the messages endpoint. Each message refers
+    to its sender by ``sender_id``; the users themselves are listed once in
+    ``participants``, or in ``messages.senders`` for senders who have since
+    left the conversation. The payload stays the same size however long the
+    conversation grows.
+    """
 
-    conversation_id = serializers.UUIDField(source="id", read_only=True)
+    recent_messages = 20
+
+    conversation_id = serializers.UUIDField(source="pk", read_only=True)
     participants = UserSerializer(many=True, read_only=True)
-    messages = MessageSerializer(many=True, read_only=True)
+    messages = serializers.SerializerMethodField()
 
     # Field for writing participants (using IDs)
     participant_ids = serializers.PrimaryKeyRelatedField(
@@ -124,6 +180,34 @@ class ConversationDetailSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["conversation_id", "created_at", "messages"]
 
+    def get_messages(self, obj):
+        latest = list(
+            obj.messages.order_by("-sent_at", "-message_id")[: self.recent_messages + 1]
+        )
+        recent = latest[: self.recent_messages]
+        next_link = None
+        if len(latest) > self.recent_messages:
+            url = reverse(
+                "chats:conversation-messages-list",
+                kwargs={"conversation_id": obj.pk},
+            )
+            request = self.context.get("request")
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            next_link = MessagePagination().encode_cursor(
+                recent[-1], reverse=False, base_url=url
+            )
+        # Senders who have left are not among the participants; look them
+        # up too, so every sender_id resolves.
+        participant_ids = {user.pk for user in obj.participants.all()}
+        former_ids = {m.sender_id for m in recent} - participant_ids
+        senders = User.objects.filter(pk__in=former_ids) if former_ids else []
+        return {
+            "links": {"next": next_link},
+            "results": ConversationMessageSerializer(recent, many=True).data,
+            "senders": UserSerializer(senders, many=True).data,
+        }
+
     def validate_participant_ids(self, value):
         """Ensure at least 2 participants in a conversation"""
         if len(value) < 2:
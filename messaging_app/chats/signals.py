@@ -0,0 +1,17 @@
+# messaging_app/chats/signals.py
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Message
+from .search import get_search_backend
+
+
+@receiver(post_save, sender=Message)
+def index_message(sender, instance, update_fields=None, using=None, **kwargs):
+    """
+    Keep the search index current as messages are created and edited
+    """
+    if update_fields is not None and "message_body" not in update_fields:
+        return
+    get_search_backend(using).update(instance)
@@ -1,3 +1,468 @@
-from django.test import TestCase
+import base64
+import json
+import re
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .filters import MessageFilter
+from .models import Conversation, Message, MessageTerm, User
+from .search import get_search_backend
+
+
+def full_scans(queryset):
+    """
+    Return the parts of the queryset's plan that read a whole table.
+
+    PostgreSQL is told to avoid sequential scans first, so one only shows
+    up when no index can serve the query at all, however small the table.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        return re.findall(r"Seq Scan on \w+", queryset.explain())
+    if connection.vendor == "mysql":
+        scans = []
+
+        def walk(node):
+            if isinstance(node, dict):
+                if node.get("access_type") == "ALL":
+                    scans.append(node.get("table_name"))
+                for value in node.values():
+                    walk(value)
+            elif isinstance(node, list):
+                for value in node:
+                    walk(value)
+
+        walk(json.loads(queryset.explain(format="json")))
+        return scans
+    # SQLite reports SEARCH for index lookups and SCAN for a pass over a
+    # whole table or index; FTS5 MATCH lookups also show up as SCANs of a
+    # virtual table.
+    return [
+        line
+        for line in queryset.explain().splitlines()
+        if re.search(r"\bSCAN\b", line)
+        and "VIRTUAL TABLE" not in line
+        and "CONSTANT ROW" not in line
+    ]
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username,
+        email=f"{username}@example.com",
+        first_name=username.title(),
+        last_name="Test",
+        role="guest",
+    )
+
+
+class QueryPlanTests(TestCase):
+    """
+    The hot ORM queries must be served by an index, never a full scan.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob = (
+            User.objects.create_user(
+                username=name,
+                email=f"{name}@example.com",
+                first_name=name.title(),
+                last_name="Test",
+                role="guest",
+            )
+            for name in ("alice", "bob")
+        )
+        cls.conversation = Conversation.objects.create()
+        cls.conversation.participants.add(cls.alice, cls.bob)
+        Message.objects.bulk_create(
+            Message(
+                sender=(cls.alice, cls.bob)[i % 2],
+                conversation=cls.conversation,
+                message_body=f"message {i}",
+            )
+            for i in range(10)
+        )
+        cls.message = Message.objects.first()
+
+    def assertNoFullScan(self, queryset):
+        scans = full_scans(queryset)
+        self.assertEqual(scans, [], f"full scan in plan:\n{queryset.explain()}")
+
+    def test_message_page(self):
+        queryset = Message.objects.filter(conversation=self.conversation)
+        self.assertNoFullScan(queryset.order_by("-sent_at", "-message_id")[:21])
+
+    def test_message_page_after_cursor(self):
+        queryset = Message.objects.filter(
+            Q(sent_at__lte=self.message.sent_at),
+            Q(sent_at__lt=self.message.sent_at) | Q(message_id__lt=self.message.pk),
+            conversation=self.conversation,
+        )
+        self.assertNoFullScan(queryset.order_by("-sent_at", "-message_id")[:21])
+
+    def test_conversations_of_user(self):
+        queryset = Conversation.objects.filter(participants=self.alice)
+        self.assertNoFullScan(queryset.with_last_message_id())
+
+    def test_participant_check(self):
+        queryset = self.conversation.participants.filter(pk=self.alice.pk)
+        self.assertNoFullScan(queryset)
+
+    def test_filter_sender_by_username(self):
+        queryset = MessageFilter({"sender": "ALICE"}, Message.objects.all()).qs
+        self.assertNoFullScan(queryset)
+
+    def test_filter_sender_by_id(self):
+        queryset = MessageFilter({"sender": str(self.alice.pk)}, Message.objects.all()).qs
+        self.assertNoFullScan(queryset)
+
+    def test_search(self):
+        queryset = Message.objects.filter(conversation=self.conversation)
+        self.assertNoFullScan(get_search_backend().filter(queryset, "mess"))
+
+
+class MessageFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob, cls.emile = (
+            User.objects.create_user(
+                username=name,
+                email=f"{name}@example.com",
+                first_name=name.title(),
+                last_name="Test",
+                role="guest",
+            )
+            for name in ("Alice", "Bob", "émile")
+        )
+        conversation = Conversation.objects.create()
+        for sender in (cls.alice, cls.bob, cls.emile):
+            Message.objects.create(
+                sender=sender, conversation=conversation, message_body="hi"
+            )
+
+    def senders(self, value):
+        queryset = MessageFilter({"sender": value}, Message.objects.all()).qs
+        return {message.sender for message in queryset}
+
+    def test_sender_username_ignores_case(self):
+        self.assertEqual(self.senders("aLiCe"), {self.alice})
+
+    def test_sender_username_non_ascii(self):
+        self.assertEqual(self.senders("émile"), {self.emile})
+        self.assertEqual(self.senders("éMILE"), {self.emile})
+
+    def test_sender_id(self):
+        self.assertEqual(self.senders(str(self.bob.pk)), {self.bob})
+
+    def test_unknown_sender(self):
+        self.assertEqual(self.senders("carol"), set())
+
+
+class MessageSearchTests(TestCase):
+    """
+    Runs against the database's own search backend.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user(
+            username="alice",
+            email="alice@example.com",
+            first_name="Alice",
+            last_name="Test",
+            role="guest",
+        )
+        cls.conversation = Conversation.objects.create()
+        cls.conversation.participants.add(cls.alice)
+        cls.notes, cls.releases, cls.lunch = (
+            Message.objects.create(
+                sender=cls.alice, conversation=cls.conversation, message_body=body
+            )
+            for body in (
+                "The release notes are up",
+                "Release, release, RELEASE!",
+                "Lunch?",
+            )
+        )
+
+    def search(self, query):
+        return list(get_search_backend().search(Message.objects.all(), query))
+
+    def test_prefix_match(self):
+        self.assertCountEqual(self.search("rel"), [self.notes, self.releases])
+
+    def test_every_term_must_match(self):
+        self.assertEqual(self.search("release note"), [self.notes])
+
+    def test_ranked_by_relevance(self):
+        self.assertEqual(self.search("release"), [self.releases, self.notes])
+
+    def test_filter(self):
+        matches = get_search_backend().filter(Message.objects.all(), "RELEASE")
+        self.assertCountEqual(matches, [self.notes, self.releases])
+
+    def test_query_without_words(self):
+        self.assertEqual(self.search("?!"), [])
+
+    def test_edit_reindexes(self):
+        self.lunch.message_body = "Release party"
+        self.lunch.save()
+        self.assertEqual(self.search("party"), [self.lunch])
+        self.assertEqual(self.search("lunch"), [])
+
+    def test_delete_unindexes(self):
+        self.releases.delete()
+        self.assertEqual(self.search("release"), [self.notes])
+
+    def test_search_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        url = f"/api/v1/conversations/{self.conversation.pk}/messages/search/"
+        response = client.get(url, {"q": "release", "page_size": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [m["message_body"] for m in response.data["results"]],
+            [self.releases.message_body],
+        )
+        self.assertEqual(client.get(url).status_code, 400)
+
+    def test_search_filter_on_list(self):
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        url = f"/api/v1/conversations/{self.conversation.pk}/messages/"
+        response = client.get(url, {"search": "lun"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [m["message_body"] for m in response.data["results"]],
+            [self.lunch.message_body],
+        )
+
+    def test_search_filter_applied_once(self):
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        url = f"/api/v1/conversations/{self.conversation.pk}/messages/"
+        with mock.patch.object(
+            MessageFilter,
+            "filter_search",
+            autospec=True,
+            side_effect=MessageFilter.filter_search,
+        ) as filter_search:
+            client.get(url, {"search": "lun"})
+        self.assertEqual(filter_search.call_count, 1)
+
+    def test_long_words(self):
+        word = "x" * 70
+        message = Message.objects.create(
+            sender=self.alice, conversation=self.conversation, message_body=word
+        )
+        self.assertEqual(self.search(word), [message])
+
+    @skipUnless(connection.vendor == "sqlite", "SQLite rowids")
+    def test_survives_renumbered_rowids(self):
+        # VACUUM and table remakes may renumber rowids of tables, like
+        # chats_message, whose primary key is not an INTEGER alias.
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE chats_message SET rowid = -rowid")
+        self.assertEqual(self.search("lunch"), [self.lunch])
+        self.lunch.delete()
+        self.assertEqual(self.search("lunch"), [])
+        self.assertCountEqual(self.search("release"), [self.notes, self.releases])
+
+
+@override_settings(CHATS_SEARCH_BACKEND="chats.search.InvertedIndexSearchBackend")
+class InvertedIndexSearchTests(MessageSearchTests):
+    def test_postings(self):
+        postings = MessageTerm.objects.filter(message=self.releases)
+        self.assertEqual(list(postings.values_list("term", "occurrences")), [("release", 3)])
+
+
+class MessagePaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = create_user("alice")
+        cls.conversation = Conversation.objects.create()
+        cls.conversation.participants.add(cls.alice)
+        cls.url = f"/api/v1/conversations/{cls.conversation.pk}/messages/"
+        # Seven messages over three timestamps, so pages split ties.
+        start = timezone.now() - timedelta(days=1)
+        for i in range(7):
+            message = Message.objects.create(
+                sender=cls.alice, conversation=cls.conversation, message_body=str(i)
+            )
+            sent_at = start + timedelta(minutes=i // 3)
+            Message.objects.filter(pk=message.pk).update(sent_at=sent_at)
+        cls.oldest_first = [
+            str(pk)
+            for pk in Message.objects.order_by("sent_at", "message_id").values_list(
+                "pk", flat=True
+            )
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        ids = [m["message_id"] for m in response.data["results"]]
+        return ids, response.data["links"]
+
+    def walk(self, **params):
+        """Follow next links to the end, then previous links back"""
+        ids, links = self.get(self.url, page_size=2, **params)
+        pages = [ids]
+        while links["next"]:
+            ids, links = self.get(links["next"])
+            pages.append(ids)
+        backwards = [ids]
+        while links["previous"]:
+            ids, links = self.get(links["previous"])
+            backwards.append(ids)
+        return pages, backwards[::-1]
+
+    def test_pages_cover_ties_once(self):
+        pages, backwards = self.walk()
+        self.assertEqual(sum(pages, []), self.oldest_first[::-1])
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        self.assertEqual(backwards, pages)
+
+    def test_oldest_first(self):
+        pages, backwards = self.walk(ordering="sent_at")
+        self.assertEqual(sum(pages, []), self.oldest_first)
+        self.assertEqual(backwards, pages)
+
+    def test_first_page_has_no_previous_link(self):
+        ids, links = self.get(self.url)
+        self.assertEqual(len(ids), 7)
+        self.assertEqual(links, {"next": None, "previous": None})
+
+    def test_invalid_cursor(self):
+        def token(data):
+            return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+        message_id = self.oldest_first[0]
+        cursors = [
+            "garbage",
+            "!!!",
+            base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+            token([1, 2, 3]),
+            token({"t": "yesterday", "id": message_id, "r": 0}),
+            token({"t": timezone.now().isoformat(), "id": "nope", "r": 0}),
+            token({"t": timezone.now().isoformat(), "id": message_id}),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.client.get(self.url, {"cursor": cursor})
+                self.assertEqual(response.status_code, 404)
+
+
+class ConversationInboxTests(TestCase):
+    url = "/api/v1/conversations/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob = create_user("alice"), create_user("bob")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def add_conversations(self, count, messages=3):
+        for _ in range(count):
+            conversation = Conversation.objects.create()
+            conversation.participants.add(self.alice, self.bob)
+            for i in range(messages):
+                Message.objects.create(
+                    sender=(self.alice, self.bob)[i % 2],
+                    conversation=conversation,
+                    message_body=f"message {i}",
+                )
+
+    def test_query_count_does_not_grow_with_conversations(self):
+        self.add_conversations(2)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.add_conversations(15)
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data["results"]), 17)
+
+    def test_last_message(self):
+        self.add_conversations(1, messages=3)
+        (conversation,) = self.client.get(self.url).data["results"]
+        self.assertEqual(conversation["last_message"]["message_body"], "message 2")
+
+    def test_conversation_without_messages(self):
+        self.add_conversations(1, messages=0)
+        self.add_conversations(1, messages=1)
+        results = self.client.get(self.url).data["results"]
+        self.assertCountEqual(
+            [c["last_message"] and c["last_message"]["message_body"] for c in results],
+            [None, "message 0"],
+        )
+
+
+class ConversationDetailTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob = create_user("alice"), create_user("bob")
+        cls.conversation = Conversation.objects.create()
+        cls.conversation.participants.add(cls.alice, cls.bob)
+        cls.url = f"/api/v1/conversations/{cls.conversation.pk}/"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def add_messages(self, count, sender=None):
+        for i in range(count):
+            Message.objects.create(
+                sender=sender or self.alice,
+                conversation=self.conversation,
+                message_body=f"message {i}",
+            )
+
+    def test_next_link_continues_after_embedded_messages(self):
+        self.add_messages(25)
+        messages = self.client.get(self.url).data["messages"]
+        embedded = [m["message_id"] for m in messages["results"]]
+        response = self.client.get(messages["links"]["next"])
+        self.assertEqual(response.status_code, 200)
+        rest = [m["message_id"] for m in response.data["results"]]
+        newest_first = Message.objects.order_by("-sent_at", "-message_id")
+        self.assertEqual(len(embedded), 20)
+        self.assertEqual(
+            embedded + rest, [str(pk) for pk in newest_first.values_list("pk", flat=True)]
+        )
+
+    def test_no_next_link_when_everything_is_embedded(self):
+        self.add_messages(20)
+        messages = self.client.get(self.url).data["messages"]
+        self.assertEqual(len(messages["results"]), 20)
+        self.assertIsNone(messages["links"]["next"])
+
+    def test_senders_who_left(self):
+        self.add_messages(1, sender=self.bob)
+        self.add_messages(1)
+        self.conversation.participants.remove(self.bob)
+        data = self.client.get(self.url).data
+        self.assertEqual(
+            [user["user_id"] for user in data["participants"]], [str(self.alice.pk)]
+        )
+        self.assertEqual(
+            [user["user_id"] for user in data["messages"]["senders"]], [str(self.bob.pk)]
+        )
+
+    def test_no_senders_lookup_while_all_are_participants(self):
+        self.add_messages(1, sender=self.bob)
+        self.assertEqual(self.client.get(self.url).data["messages"]["senders"], [])
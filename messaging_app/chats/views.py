@@ -5,7 +5,7 @@
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
 
@@ -13,6 +13,7 @@ from .filters import MessageFilter
 from .models import Conversation, Message, User
 from .pagination import MessagePagination
 from .permissions import IsMessageOwnerOrReadOnly, IsParticipantOfConversation
+from .search import get_search_backend
 from .serializers import (
     ConversationDetailSerializer,
     ConversationListSerializer,
@@ -91,9 +92,15 @@ class ConversationViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         # Get conversations where current user is a participant
-        return Conversation.objects.filter(
+        queryset = Conversation.objects.filter(
             participants=self.request.user
-        ).prefetch_related("participants", "messages")
+        ).prefetch_related("participants")
+        if self.action == "list":
+            # Only the latest message is shown; ConversationListSerializer
+            # loads them for the whole page in one query.
+            return queryset.with_last_message_id()
+        # ConversationDetailSerializer embeds only the latest messages.
+        return queryset
 
     def get_serializer_class(self) -> type:
         if self.action == "list":
@@ -111,7 +118,9 @@ class ConversationViewSet(viewsets.ModelViewSet):
 
         conversation = serializer.save(participants=participants)
         return Response(
-            ConversationDetailSerializer(conversation).data,
+            ConversationDetailSerializer(
+                conversation, context=self.get_serializer_context()
+            ).data,
             status=status.HTTP_201_CREATED,
         )
 
@@ -120,7 +129,7 @@ class ConversationViewSet(viewsets.ModelViewSet):
         Override to ensure proper permission checking for object retrieval
         """
         obj = super().get_object()
-        if not obj.participants.filter(id=self.request.user.id).exists():
+        if not obj.participants.filter(pk=self.request.user.pk).exists():
             raise PermissionDenied(
                 "You do not have permission to access this conversation",
                 code=status.HTTP_403_FORBIDDEN,
@@ -140,25 +149,23 @@ class MessageViewSet(viewsets.ModelViewSet):
         IsMessageOwnerOrReadOnly,
     ]
     http_method_names = ["get", "post", "patch", "delete", "head", "options"]
+    # ?search= is MessageFilter's full-text search; DRF's SearchFilter would
+    # AND a leading-wildcard LIKE scan onto it.
     filter_backends = [
         DjangoFilterBackend,
         filters.OrderingFilter,
-        filters.SearchFilter,
     ]
     filterset_class = MessageFilter
     pagination_class = MessagePagination
-    ordering_fields = ["sent_at", "sender__username"]
+    # MessagePagination pages on (sent_at, message_id), so only sent_at can order.
+    ordering_fields = ["sent_at"]
     ordering = ["-sent_at"]
-    search_fields = [
-        "message_body",
-        "sender__first_name",
-        "sender__last_name",
-        "sender__username",
-    ]
 
     def get_queryset(self):
-        # Get conversation ID from URL
-        conversation_id = self.kwargs.get("conversation_id")
+        # Get conversation ID from URL (the nested router names it conversation_pk)
+        conversation_id = self.kwargs.get(
+            "conversation_id", self.kwargs.get("conversation_pk")
+        )
 
         # Verify conversation exists and user is participant
         try:
@@ -172,26 +179,38 @@ class MessageViewSet(viewsets.ModelViewSet):
                 code=status.HTTP_403_FORBIDDEN,
             )
 
-        # Return messages for this conversation with optimized queries
+        # Return messages for this conversation with related data; list,
+        # get_object and search apply filter_queryset themselves.
         queryset = Message.objects.filter(conversation=conversation)
-
-        # Apply additional filtering
-        queryset = self.filter_queryset(queryset)
-
-        # Return with related data
         return queryset.select_related("sender", "conversation").order_by("-sent_at")
 
+    @action(detail=False, methods=["get"])
+    def search(self, request, *args, **kwargs):
+        """
+        Messages matching ``q``, most relevant first. Every word must match,
+        as a prefix; ``page_size`` caps the number of results.
+        """
+        query = request.query_params.get("q", "")
+        if not query.strip():
+            raise ValidationError({"q": "This query parameter is required."})
+        queryset = self.filter_queryset(self.get_queryset())
+        limit = self.paginator.get_page_size(request)
+        results = get_search_backend(queryset.db).search(queryset, query)[:limit]
+        return Response({"results": self.get_serializer(results, many=True).data})
+
     def create(self, request, *args, **kwargs):
-        # Get conversation ID from URL
-        conversation_id = self.kwargs.get("conversation_id")
+        # Get conversation ID from URL (the nested router names it conversation_pk)
+        conversation_id = self.kwargs.get(
+            "conversation_id", self.kwargs.get("conversation_pk")
+        )
 
         # Verify conversation exists and user is participant
         try:
-            conversation = Conversation.objects.get(id=conversation_id)
+            conversation = Conversation.objects.get(pk=conversation_id)
         except Conversation.DoesNotExist:
             raise NotFound("Conversation not found")
 
-        if not conversation.participants.filter(id=request.user.id).exists():
+        if not conversation.participants.filter(pk=request.user.pk).exists():
             raise PermissionDenied(
                 "You are not a participant in this conversation",
                 code=status.HTTP_403_FORBIDDEN,
@@ -1,7 +1,10 @@
 import sqlite3
 
 class DatabaseConnection:
-    """Custom context manager for database connections."""
+    """Custom context manager for database connections.
+
+    See async_db.AsyncDatabaseConnection for the pooled ``async with`` version.
+    """
     
     def __init__(self, db_name):
         self.db_name = db_name
@@ -1,28 +1,65 @@
 import sqlite3
+import replicas
 
 class ExecuteQuery:
-    """Reusable context manager for executing queries."""
+    """Reusable context manager for executing queries.
+
+    Yields the full result list by default. With ``stream=True`` it yields
+    the cursor, which fetches rows lazily as it is iterated. With
+    ``many=True``, ``params`` is a sequence of parameter tuples run through
+    one ``executemany`` and committed; the row count is yielded.
+    Queries against the router's primary are routed by ``replicas.router``:
+    reads go to a replica (or the primary if it fails, or just after this
+    thread wrote), writes and ``many=True`` to the primary.
+    See async_db.AsyncExecuteQuery for the pooled ``async with`` version.
+    """
     
-    def __init__(self, db_name, query, params=None):
+    def __init__(self, db_name, query, params=None, stream=False, many=False):
         self.db_name = db_name
         self.query = query
         self.params = params or ()
+        self.stream = stream
+        self.many = many
         self.conn = None
         self.cursor = None
     
     def __enter__(self):
         """Execute the query and return results."""
-        self.conn = sqlite3.connect(self.db_name)
+        router = replicas.router
+        if self.db_name != router.primary:
+            return self._execute(self.db_name)
+        target = router.for_write() if self.many else router.route(self.query)
+        if target == router.primary:
+            return self._execute(target)
+        try:
+            result = self._execute(target)
+        except sqlite3.OperationalError:
+            router.report_failure(target)
+            self.__exit__(None, None, None)
+            return self._execute(router.primary)
+        router.report_success(target)
+        return result
+
+    def _execute(self, target):
+        self.conn = sqlite3.connect(target, uri=True)
         self.cursor = self.conn.cursor()
+        if self.many:
+            self.cursor.executemany(self.query, self.params)
+            self.conn.commit()
+            return self.cursor.rowcount
         self.cursor.execute(self.query, self.params)
+        if self.stream:
+            return self.cursor
         return self.cursor.fetchall()
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Clean up resources."""
         if self.cursor:
             self.cursor.close()
+            self.cursor = None
         if self.conn:
             self.conn.close()
+            self.conn = None
 
 # Usage example
 with ExecuteQuery('users.db', "SELECT * FROM users WHERE age > ?", (25,)) as results:
@@ -1,20 +1,19 @@
 import asyncio
-import aiosqlite
+from async_db import close_pools
+from fanout import FanOutExecutor
+
+executor = FanOutExecutor('users.db')
 
 async def async_fetch_users():
     """Fetch all users from the database."""
-    async with aiosqlite.connect('users.db') as db:
-        async with db.execute("SELECT * FROM users") as cursor:
-            return await cursor.fetchall()
+    return await executor.fetch("SELECT * FROM users")
 
 async def async_fetch_older_users():
     """Fetch users older than 40 from the database."""
-    async with aiosqlite.connect('users.db') as db:
-        async with db.execute("SELECT * FROM users WHERE age > ?", (40,)) as cursor:
-            return await cursor.fetchall()
+    return await executor.fetch("SELECT * FROM users WHERE age > ?", (40,))
 
 async def fetch_concurrently():
-    """Run both queries concurrently."""
+    """Run both queries concurrently over the shared read pool."""
     users, older_users = await asyncio.gather(
         async_fetch_users(),
         async_fetch_older_users()
@@ -22,5 +21,12 @@ async def fetch_concurrently():
     print("All users:", users)
     print("Users older than 40:", older_users)
 
+async def main():
+    try:
+        await fetch_concurrently()
+    finally:
+        # Pooled aiosqlite connections keep worker threads alive until closed.
+        await close_pools()
+
 if __name__ == "__main__":
-    asyncio.run(fetch_concurrently())
+    asyncio.run(main())
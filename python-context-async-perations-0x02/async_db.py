@@ -0,0 +1,214 @@
+import asyncio
+import contextlib
+import sqlite3
+import aiosqlite
+import replicas
+
+
+class AsyncConnectionPool:
+    """Pool of up to ``size`` aiosqlite connections to one database.
+
+    ``db_name`` may be a SQLite URI; read-only ones (replicas) skip
+    ``journal_mode``, which they cannot change. A pool may be shared by
+    several event loops in turn (one ``asyncio.run`` after another); its
+    slots are counted per loop.
+    """
+
+    def __init__(self, db_name, size=5, pragmas=None):
+        self.db_name = db_name
+        self.size = size
+        self.pragmas = pragmas or {"journal_mode": "WAL", "synchronous": "NORMAL"}
+        if "mode=ro" in db_name:
+            self.pragmas = {name: value for name, value in self.pragmas.items() if name != "journal_mode"}
+        self._idle = []
+        self._loop = None
+        self._slots = None
+        self._closed = False
+
+    def _loop_slots(self):
+        """Return the semaphore of the running loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # asyncio primitives are bound to the loop that first waits on them.
+            self._loop, self._slots = loop, asyncio.Semaphore(self.size)
+        return self._slots
+
+    async def acquire(self):
+        """Check out an idle connection, opening one if none is free."""
+        await self._loop_slots().acquire()
+        if self._idle:
+            return self._idle.pop()
+        try:
+            conn = await aiosqlite.connect(self.db_name, uri=True)
+            for name, value in self.pragmas.items():
+                await conn.execute(f"PRAGMA {name} = {value}")
+        except BaseException:
+            self._slots.release()
+            raise
+        return conn
+
+    async def release(self, conn):
+        """Return a connection, rolling back anything left uncommitted."""
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+            if self._closed:
+                await conn.close()
+            else:
+                self._idle.append(conn)
+        except Exception:
+            await conn.close()
+        finally:
+            self._slots.release()
+
+    @contextlib.asynccontextmanager
+    async def connection(self):
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
+    async def close(self):
+        """Wait for checked-out connections to come back, then close them all.
+
+        Connections released after this are closed instead of kept.
+        """
+        self._closed = True
+        slots = self._slots if self._loop is asyncio.get_running_loop() else None
+        if slots is not None:
+            # Holding every slot means no connection is checked out.
+            for _ in range(self.size):
+                await slots.acquire()
+        idle, self._idle = self._idle, []
+        try:
+            for conn in idle:
+                await conn.close()
+        finally:
+            if slots is not None:
+                for _ in range(self.size):
+                    slots.release()
+
+
+_pools = {}
+
+
+def get_pool(db_name, size=5):
+    """Return the shared pool of ``size`` connections to ``db_name``.
+
+    Pools are keyed by both, so callers asking for different sizes each
+    get the bound they asked for instead of whichever came first.
+    """
+    pool = _pools.get((db_name, size))
+    if pool is None:
+        pool = _pools[db_name, size] = AsyncConnectionPool(db_name, size)
+    return pool
+
+
+async def close_pools():
+    """Close every shared pool before the event loop shuts down.
+
+    Each open aiosqlite connection keeps a worker thread alive, so a script
+    that skips this will not exit. Connections still checked out (say, by
+    a query being interrupted) are waited for and closed too.
+    """
+    pools = list(_pools.values())
+    _pools.clear()
+    for pool in pools:
+        await pool.close()
+
+
+class AsyncDatabaseConnection:
+    """Async context manager lending a pooled connection to the database."""
+
+    def __init__(self, db_name, pool=None):
+        self.db_name = db_name
+        self.pool = pool or get_pool(db_name)
+        self.conn = None
+
+    async def __aenter__(self):
+        """Check a connection out of the pool."""
+        self.conn = await self.pool.acquire()
+        return self.conn
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Return the connection to the pool."""
+        if self.conn:
+            await self.pool.release(self.conn)
+            self.conn = None
+
+
+class AsyncExecuteQuery:
+    """Async context manager executing a query on a pooled connection.
+
+    Queries against the router's primary are routed by
+    ``replicas.router``: reads go to a replica (falling back to the
+    primary if it fails), writes and ``many=True`` to the primary.
+
+    By default ``async with`` yields the full result list. With
+    ``stream=True`` it yields an async iterator that fetches ``batch_size``
+    rows at a time, so memory stays flat for large results; iterating the
+    object directly (``async for row in AsyncExecuteQuery(...)``) does the
+    same. With ``many=True``, ``params`` is a sequence of parameter tuples
+    run through one ``executemany`` and committed; the row count is yielded.
+    """
+
+    def __init__(self, db_name, query, params=None, stream=False, many=False,
+                 batch_size=500, pool=None):
+        self.query = query
+        self.params = params or ()
+        self.stream = stream
+        self.many = many
+        self.batch_size = batch_size
+        self.db_name = db_name
+        self.pool = pool
+        self.connection = None
+        self.cursor = None
+
+    async def __aenter__(self):
+        """Execute the query and return results."""
+        router = replicas.router
+        if self.pool is not None or self.db_name != router.primary:
+            return await self._execute(self.db_name)
+        target = router.for_write() if self.many else router.route(self.query)
+        if target == router.primary:
+            return await self._execute(target)
+        try:
+            result = await self._execute(target)
+        except sqlite3.OperationalError:
+            router.report_failure(target)
+            return await self._execute(router.primary)
+        router.report_success(target)
+        return result
+
+    async def _execute(self, target):
+        self.connection = AsyncDatabaseConnection(target, self.pool)
+        conn = await self.connection.__aenter__()
+        try:
+            if self.many:
+                self.cursor = await conn.executemany(self.query, self.params)
+                await conn.commit()
+                return self.cursor.rowcount
+            self.cursor = await conn.execute(self.query, self.params)
+            self.cursor.arraysize = self.batch_size
+            if self.stream:
+                return self.cursor
+            return await self.cursor.fetchall()
+        except BaseException:
+            await self.__aexit__(None, None, None)
+            raise
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Clean up resources."""
+        if self.cursor:
+            await self.cursor.close()
+            self.cursor = None
+        if self.connection:
+            await self.connection.__aexit__(exc_type, exc_val, exc_tb)
+            self.connection = None
+
+    async def __aiter__(self):
+        self.stream = True
+        async with self as rows:
+            async for row in rows:
+                yield row
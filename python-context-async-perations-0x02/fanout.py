@@ -0,0 +1,161 @@
+import asyncio
+import sqlite3
+from collections import namedtuple
+import replicas
+from async_db import get_pool
+
+QueryResult = namedtuple("QueryResult", ["key", "rows", "error"])
+
+
+async def _cancel_all(tasks):
+    """Cancel ``tasks`` and wait until they have finished cleaning up.
+
+    Cleanup (interrupting the query, returning its connection) then happens
+    before the caller moves on, e.g. to close_pools().
+    """
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _normalize(queries):
+    """Accept ``{key: query}`` or a list of queries; a query is SQL or (SQL, params)."""
+    items = queries.items() if isinstance(queries, dict) else enumerate(queries)
+    normalized = []
+    for key, query in items:
+        sql, params = (query, ()) if isinstance(query, str) else query
+        normalized.append((key, sql, tuple(params or ())))
+    return normalized
+
+
+class FanOutExecutor:
+    """Runs many independent read queries over a pool of read connections.
+
+    At most ``concurrency`` queries run at once across every database it
+    reads from (primary and replicas alike). Identical queries (same
+    SQL and parameters) already in flight are shared rather than run again.
+    Each caller gets its own ``timeout``; once every caller waiting on a
+    query has timed out or been cancelled, the query is interrupted.
+    When ``db_name`` is the router's primary, each query reads from a
+    replica picked by ``replicas.router``, retried on the primary if that
+    replica fails.
+    """
+
+    def __init__(self, db_name, concurrency=8, timeout=None):
+        self.db_name = db_name
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._in_flight = {}
+        self._waiters = {}
+        self._loop = None
+        self._slots = None
+        self.stats = {"executed": 0, "deduplicated": 0, "timeouts": 0}
+
+    def _loop_slots(self):
+        """Return the semaphore of the running loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._slots = loop, asyncio.Semaphore(self.concurrency)
+        return self._slots
+
+    async def _execute(self, sql, params):
+        # Pools are per database and shared with other executors, so they
+        # do not bound this executor by themselves.
+        async with self._loop_slots():
+            return await self._route(sql, params)
+
+    async def _route(self, sql, params):
+        router = replicas.router
+        if self.db_name != router.primary:
+            return await self._execute_on(self.db_name, sql, params)
+        target = router.for_read()
+        if target == router.primary:
+            return await self._execute_on(target, sql, params)
+        try:
+            rows = await self._execute_on(target, sql, params)
+        except sqlite3.OperationalError:
+            router.report_failure(target)
+            return await self._execute_on(router.primary, sql, params)
+        router.report_success(target)
+        return rows
+
+    async def _execute_on(self, target, sql, params):
+        async with get_pool(target, self.concurrency).connection() as conn:
+            self.stats["executed"] += 1
+            try:
+                return await conn.execute_fetchall(sql, params)
+            except asyncio.CancelledError:
+                await conn.interrupt()
+                raise
+
+    def _shared(self, key):
+        """Return the in-flight task for this query, starting it if needed."""
+        sql, params = key
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.stats["deduplicated"] += 1
+            return task
+        task = asyncio.ensure_future(self._execute(sql, params))
+        self._in_flight[key] = task
+
+        def forget(done):
+            self._in_flight.pop(key, None)
+            if not done.cancelled():
+                done.exception()  # retrieved here in case every waiter timed out
+
+        task.add_done_callback(forget)
+        return task
+
+    async def fetch(self, sql, params=(), timeout=None):
+        """Run one query (sharing an identical in-flight one) and return its rows."""
+        key = (sql, tuple(params))
+        task = self._shared(key)
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        # timeout=0 means "give up at once", not "use the default".
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            # shield: one caller timing out must not cancel a shared query.
+            return list(await asyncio.wait_for(asyncio.shield(task), timeout))
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                if not task.done():
+                    await _cancel_all([task])
+
+    async def as_completed(self, queries, timeout=None):
+        """Yield a QueryResult per query as soon as each one finishes.
+
+        Failures and timeouts are reported in ``error`` rather than raised,
+        so one slow or broken query does not hold back the others.
+        """
+        async def run(key, sql, params):
+            try:
+                return QueryResult(key, await self.fetch(sql, params, timeout), None)
+            except Exception as exc:
+                return QueryResult(key, None, exc)
+
+        tasks = [asyncio.ensure_future(run(*query)) for query in _normalize(queries)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            await _cancel_all(tasks)
+
+    async def run(self, queries, timeout=None):
+        """Run every query and return their rows in input order (dict in, dict out).
+
+        Raises the first error encountered, after cancelling the rest.
+        """
+        normalized = _normalize(queries)
+        tasks = [asyncio.ensure_future(self.fetch(sql, params, timeout)) for _, sql, params in normalized]
+        try:
+            results = await asyncio.gather(*tasks)
+        finally:
+            await _cancel_all(tasks)
+        if isinstance(queries, dict):
+            return dict(zip((key for key, _, _ in normalized), results))
+        return results
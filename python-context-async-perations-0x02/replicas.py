@@ -0,0 +1,17 @@
+"""Replica routing, shared with python-decorators-0x01.
+
+The one implementation lives in ../python-decorators-0x01/replicas.py.
+Importing this module loads that file in its place, so ``import replicas``
+here gets the same ReplicaRouter, configure() and router.
+"""
+import importlib.util
+import os
+import sys
+
+_source = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir, "python-decorators-0x01", "replicas.py"
+)
+_spec = importlib.util.spec_from_file_location(__name__, _source)
+_module = importlib.util.module_from_spec(_spec)
+sys.modules[__name__] = _module
+_spec.loader.exec_module(_module)
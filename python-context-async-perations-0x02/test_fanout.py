@@ -0,0 +1,93 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from async_db import close_pools
+from fanout import FanOutExecutor
+
+SLOW = (
+    "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n) "
+    "SELECT count(*) FROM n"
+)
+
+
+def worker_threads():
+    """aiosqlite worker threads still alive after a short grace period."""
+    threads = [t for t in threading.enumerate() if "_connection_worker_thread" in t.name]
+    for thread in threads:
+        thread.join(timeout=5)
+    return [thread.name for thread in threads if thread.is_alive()]
+
+
+class FanOutCleanupTests(unittest.TestCase):
+    """Abandoned queries must be cleaned up before close_pools() returns."""
+
+    def setUp(self):
+        handle, self.db = tempfile.mkstemp(suffix=".db")
+        os.close(handle)
+        sqlite3.connect(self.db).close()
+
+    def tearDown(self):
+        os.remove(self.db)
+
+    def test_timeout_then_close_pools(self):
+        async def scenario():
+            executor = FanOutExecutor(self.db)
+            with self.assertRaises(asyncio.TimeoutError):
+                await executor.fetch(SLOW, timeout=0.05)
+            await close_pools()
+
+        asyncio.run(scenario())
+        self.assertEqual(worker_threads(), [])
+
+    def test_failed_run_then_close_pools(self):
+        async def scenario():
+            executor = FanOutExecutor(self.db)
+            with self.assertRaises(sqlite3.OperationalError):
+                await executor.run([SLOW, "SELECT * FROM missing"])
+            await close_pools()
+
+        asyncio.run(scenario())
+        self.assertEqual(worker_threads(), [])
+
+    def test_abandoned_as_completed_then_close_pools(self):
+        async def scenario():
+            executor = FanOutExecutor(self.db)
+            results = executor.as_completed(["SELECT 1", SLOW])
+            self.assertEqual((await results.__anext__()).rows, [(1,)])
+            await results.aclose()
+            await close_pools()
+
+        asyncio.run(scenario())
+        self.assertEqual(worker_threads(), [])
+
+
+class FanOutConcurrencyTests(unittest.TestCase):
+    def test_concurrency_bounds_the_whole_executor(self):
+        active = peak = 0
+
+        async def route(executor, sql, params):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return [(sql,)]
+
+        async def scenario():
+            executor = FanOutExecutor("unused.db", concurrency=2)
+            queries = [f"SELECT {n}" for n in range(8)]
+            return await executor.run(queries)
+
+        with mock.patch.object(FanOutExecutor, "_route", route):
+            results = asyncio.run(scenario())
+        self.assertEqual(len(results), 8)
+        self.assertEqual(peak, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,17 +1,5 @@
 import sqlite3
-import functools
-from datetime import datetime
-
-def log_queries(func):
-    """Decorator to log SQL queries with timestamps before executing them."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        # Extract query from kwargs or args
-        query = kwargs.get('query', args[0] if args else None)
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{timestamp}] Executing query: {query}")
-        return func(*args, **kwargs)
-    return wrapper
+from query_log import log_queries, start_query_logging
 
 @log_queries
 def fetch_all_users(query):
@@ -22,5 +10,6 @@ def fetch_all_users(query):
     conn.close()
     return results
 
-# Fetch users while logging the query with timestamp
+# Fetch users while logging a structured record for the query
+start_query_logging()
 users = fetch_all_users(query="SELECT * FROM users")
@@ -1,18 +1,4 @@
-import sqlite3 
-import functools
-
-def with_db_connection(func):
-    """Decorator to handle database connections automatically."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            # Pass the connection as the first argument
-            result = func(conn, *args, **kwargs)
-            return result
-        finally:
-            conn.close()
-    return wrapper
+from db import with_db_connection
 
 @with_db_connection 
 def get_user_by_id(conn, user_id): 
@@ -1,30 +1,5 @@
-import sqlite3 
-import functools
-
-def with_db_connection(func):
-    """Decorator to handle database connections automatically."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            result = func(conn, *args, **kwargs)
-            return result
-        finally:
-            conn.close()
-    return wrapper
-
-def transactional(func):
-    """Decorator to manage database transactions."""
-    @functools.wraps(func)
-    def wrapper(conn, *args, **kwargs):
-        try:
-            result = func(conn, *args, **kwargs)
-            conn.commit()
-            return result
-        except Exception as e:
-            conn.rollback()
-            raise e
-    return wrapper
+from db import with_db_connection
+from transactions import transactional
 
 @with_db_connection 
 @transactional 
@@ -32,5 +7,11 @@ def update_user_email(conn, user_id, new_email):
     cursor = conn.cursor() 
     cursor.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
 
+@with_db_connection
+@transactional
+def update_user_emails(conn, updates):
+    """Bulk fast path: apply ``(new_email, user_id)`` pairs with one executemany."""
+    conn.executemany("UPDATE users SET email = ? WHERE id = ?", updates)
+
 # Update user's email with automatic transaction handling
 update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
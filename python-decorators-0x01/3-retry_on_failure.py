@@ -1,35 +1,5 @@
-import time
-import sqlite3 
-import functools
-
-def with_db_connection(func):
-    """Decorator to handle database connections automatically."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            result = func(conn, *args, **kwargs)
-            return result
-        finally:
-            conn.close()
-    return wrapper
-
-def retry_on_failure(retries=3, delay=2):
-    """Decorator to retry database operations on failure."""
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            last_exception = None
-            for attempt in range(retries):
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    last_exception = e
-                    if attempt < retries - 1:
-                        time.sleep(delay)
-            raise last_exception
-        return wrapper
-    return decorator
+from db import with_db_connection
+from retry import retry_on_failure
 
 @with_db_connection
 @retry_on_failure(retries=3, delay=1)
@@ -1,38 +1,21 @@
-import time
-import sqlite3 
 import functools
-import hashlib
-
-query_cache = {}
+from caching import database_identity, query_cache, read_tables
+from db import with_db_connection
 
 def cache_query(func):
-    """Decorator to cache query results based on the SQL query string."""
-    @functools.wraps(func)
-    def wrapper(conn, query, *args, **kwargs):
-        # Create a cache key by hashing the query
-        cache_key = hashlib.md5(query.encode()).hexdigest()
-        
-        # Return cached result if available
-        if cache_key in query_cache:
-            print("Returning cached result")
-            return query_cache[cache_key]
-        
-        # Execute query and cache the result
-        result = func(conn, query, *args, **kwargs)
-        query_cache[cache_key] = result
-        return result
-    return wrapper
+    """Decorator to cache query results keyed on database, query and parameters.
 
-def with_db_connection(func):
-    """Decorator to handle database connections automatically."""
+    Results live in the shared bounded LRU/TTL ``query_cache``; writes made
+    through ``transactional`` evict entries for the tables they touch.
+    """
     @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
-            result = func(conn, *args, **kwargs)
-            return result
-        finally:
-            conn.close()
+    def wrapper(conn, query, *args, **kwargs):
+        cache_key = (database_identity(conn), query, repr(args), repr(sorted(kwargs.items())))
+        return query_cache.get_or_execute(
+            cache_key,
+            read_tables(query),
+            lambda: func(conn, query, *args, **kwargs),
+        )
     return wrapper
 
 @with_db_connection
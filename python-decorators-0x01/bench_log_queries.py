@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Measure the per-call overhead of log_queries.
+
+Times a no-op "query" function bare and decorated with sampling off,
+sampled at 1%, and logging every call (to a discarding handler), and
+reports the added cost per call in microseconds.
+
+    python3 bench_log_queries.py
+"""
+import logging
+import timeit
+
+from query_log import log_queries, start_query_logging, stop_query_logging
+
+QUERY = "SELECT * FROM users WHERE id = 42"
+
+
+def fetch(query):
+    return []
+
+
+VARIANTS = {
+    "sampling off": log_queries(sample_rate=0)(fetch),
+    "sampled 1%": log_queries(sample_rate=0.01)(fetch),
+    "every call": log_queries(sample_rate=1.0)(fetch),
+}
+
+
+def per_call_us(func, number):
+    return min(timeit.repeat(lambda: func(QUERY), number=number, repeat=5)) / number * 1e6
+
+
+def main(number=200_000):
+    start_query_logging(logging.NullHandler())
+    baseline = per_call_us(fetch, number)
+    print(f"{'variant':<15}{'us/call':>10}{'overhead us':>14}")
+    print(f"{'bare':<15}{baseline:>10.3f}{0:>14.3f}")
+    for name, func in VARIANTS.items():
+        cost = per_call_us(func, number)
+        print(f"{name:<15}{cost:>10.3f}{cost - baseline:>14.3f}")
+    stop_query_logging()
+
+
+if __name__ == "__main__":
+    main()
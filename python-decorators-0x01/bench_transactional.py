@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Benchmark per-call commits against group commit and executemany.
+
+Runs N single-row email updates on a temporary SQLite database in WAL
+mode three ways: one commit per transactional call, the same calls
+inside a group_commit block, and a single executemany.
+
+    python3 bench_transactional.py --updates 20000 --synchronous FULL
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import db
+from transactions import group_commit, transactional
+
+
+@db.with_db_connection
+@transactional
+def update_user_email(conn, user_id, new_email):
+    conn.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
+
+
+@db.with_db_connection
+@transactional
+def update_user_emails(conn, updates):
+    conn.executemany("UPDATE users SET email = ? WHERE id = ?", updates)
+
+
+def seed(path, users):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT, age INTEGER)")
+    conn.executemany(
+        "INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+        ((f"user{i}", f"user{i}@example.com", 20 + i % 60) for i in range(users)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def per_call(args):
+    for i in range(args.updates):
+        update_user_email(i % args.users + 1, f"per-call{i}@example.com")
+
+
+def grouped(args):
+    with group_commit(max_writes=args.batch, max_delay=args.window):
+        for i in range(args.updates):
+            update_user_email(i % args.users + 1, f"grouped{i}@example.com")
+
+
+def bulk(args):
+    update_user_emails([(f"bulk{i}@example.com", i % args.users + 1) for i in range(args.updates)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--batch", type=int, default=1000, help="group commit size")
+    parser.add_argument("--window", type=float, default=0.05, help="group commit window (s)")
+    parser.add_argument("--synchronous", default="FULL")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "users.db")
+        seed(path, args.users)
+        db.configure(path, dict(db.DEFAULT_PRAGMAS, synchronous=args.synchronous))
+        print(f"{'mode':<12}{'seconds':>10}{'writes/sec':>14}")
+        for name, run in (("per-call", per_call), ("group", grouped), ("executemany", bulk)):
+            start = time.perf_counter()
+            run(args)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<12}{elapsed:>10.3f}{args.updates / elapsed:>14.0f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
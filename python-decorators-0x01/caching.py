@@ -0,0 +1,178 @@
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+
+READ_TABLES = re.compile(r'\b(?:FROM|JOIN)\s+["`\[]?(\w+)', re.IGNORECASE)
+WRITE_TABLES = re.compile(
+    r'^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+["`\[]?(\w+)',
+    re.IGNORECASE,
+)
+
+
+def read_tables(query):
+    """Return the lower-cased table names a query reads from."""
+    return {table.lower() for table in READ_TABLES.findall(query)}
+
+
+def written_tables(query):
+    """Return the lower-cased table names a statement writes to."""
+    return {table.lower() for table in WRITE_TABLES.findall(query)}
+
+
+_identities = weakref.WeakKeyDictionary()
+
+
+def database_identity(conn):
+    """Identify the database behind a sqlite3 connection (its file path).
+
+    Looked up once per connection that can be weakly referenced, such as
+    the pooled db.Connection; plain sqlite3 connections ask every time.
+    """
+    try:
+        return _identities[conn]
+    except KeyError:
+        identity = _identities[conn] = _query_identity(conn)
+        return identity
+    except TypeError:
+        return _query_identity(conn)
+
+
+def _query_identity(conn):
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    return path or f":memory:{id(conn)}"
+
+
+def result_size(result):
+    """Rough size in bytes of a query result (rows of scalar values)."""
+    size = sys.getsizeof(result)
+    if isinstance(result, (list, tuple)):
+        for row in result:
+            size += sys.getsizeof(row)
+            if isinstance(row, (list, tuple)):
+                size += sum(sys.getsizeof(value) for value in row)
+    return size
+
+
+class QueryCache:
+    """Thread-safe LRU + TTL cache for query results.
+
+    Entries are bounded by count and approximate byte size, tagged with the
+    tables their query reads so writes can evict them, and misses on the
+    same key are coalesced so the query runs once.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tables = {}
+        self._in_flight = {}
+        self._generations = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    def get_or_execute(self, key, tables, execute):
+        """Return the cached result for key, or run ``execute()`` once to fill it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, expires_at, _, _ = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return result
+                self._remove(key)
+                self.stats["expirations"] += 1
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                self.stats["misses"] += 1
+                future = self._in_flight[key] = Future()
+                generations = [self._generations.get(table, 0) for table in tables]
+            else:
+                self.stats["coalesced"] += 1
+        if not owner:
+            return future.result()
+
+        try:
+            result = execute()
+        except BaseException as exc:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(exc)
+            raise
+        with self._lock:
+            del self._in_flight[key]
+            # Skip storing if a write invalidated these tables mid-query.
+            if generations == [self._generations.get(table, 0) for table in tables]:
+                self._store(key, tables, result)
+        future.set_result(result)
+        return result
+
+    def invalidate_tables(self, tables):
+        """Evict every entry whose query reads one of ``tables``."""
+        with self._lock:
+            for table in tables:
+                table = table.lower()
+                self._generations[table] = self._generations.get(table, 0) + 1
+                for key in list(self._tables.get(table, ())):
+                    self._remove(key)
+                    self.stats["invalidations"] += 1
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+            self._tables.clear()
+            self._bytes = 0
+
+    def info(self):
+        """Return counters plus current entry count and byte usage."""
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), bytes=self._bytes)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _store(self, key, tables, result):
+        size = result_size(result)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (result, time.monotonic() + self.ttl, size, tables)
+        self._bytes += size
+        for table in tables:
+            self._tables.setdefault(table, set()).add(key)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+
+    def _remove(self, key):
+        _, _, size, tables = self._entries.pop(key)
+        self._bytes -= size
+        for table in tables:
+            keys = self._tables.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tables[table]
+
+
+query_cache = QueryCache()
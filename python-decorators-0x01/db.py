@@ -0,0 +1,169 @@
+import contextlib
+import contextvars
+import functools
+import sqlite3
+import threading
+import replicas
+
+DATABASE = 'users.db'
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,  # negative means KiB, i.e. 64 MB of page cache
+}
+
+# Connection of the outermost decorated call in the current thread or task,
+# and whether it points at the primary (writable) database.
+_active_connection = contextvars.ContextVar("active_connection", default=None)
+_active_is_primary = contextvars.ContextVar("active_is_primary", default=False)
+
+
+class Connection(sqlite3.Connection):
+    """sqlite3 connection that can be weakly referenced, so facts about it
+    (caching.database_identity) are worked out once, not on every call."""
+
+
+class ConnectionPool:
+    """Per-thread pool of sqlite3 connections to one database.
+
+    Each thread opens its connection once, applies ``pragmas`` and keeps it
+    for later calls. sqlite3's statement cache (``cached_statements``) keeps
+    prepared statements alive across calls on that connection. ``database``
+    may be a SQLite URI; read-only ones (replicas) skip ``journal_mode``,
+    which they cannot change.
+    """
+
+    def __init__(self, database=DATABASE, pragmas=None, cached_statements=256):
+        self.database = database
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        if "mode=ro" in database:
+            self.pragmas = {name: value for name, value in self.pragmas.items() if name != "journal_mode"}
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+
+    def connection(self):
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.database, cached_statements=self.cached_statements, uri=True, factory=Connection
+            )
+            for name, value in self.pragmas.items():
+                conn.execute(f"PRAGMA {name} = {value}")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close this thread's connection, if it has one."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.conn = None
+            conn.close()
+
+
+_settings = {"pragmas": None, "cached_statements": 256}
+_pools = {}
+pool = _pools[DATABASE] = ConnectionPool()
+
+
+def get_pool(database):
+    """Return the pool for ``database`` (primary or replica), creating it on first use."""
+    target_pool = _pools.get(database)
+    if target_pool is None:
+        target_pool = _pools[database] = ConnectionPool(database, **_settings)
+    return target_pool
+
+
+def configure(database=DATABASE, pragmas=None, cached_statements=256, replica_paths=(), **router_options):
+    """Replace the pools used by with_db_connection.
+
+    ``database`` is the primary. Reads go to ``replica_paths`` when given
+    (see replicas.ReplicaRouter for ``router_options``).
+    """
+    global pool
+    close()
+    _settings.update(pragmas=pragmas, cached_statements=cached_statements)
+    replicas.configure(database, replica_paths, **router_options)
+    pool = get_pool(database)
+    return pool
+
+
+def close():
+    """Close this thread's connection in every pool."""
+    for target_pool in list(_pools.values()):
+        target_pool.close()
+    _pools.clear()
+
+
+@contextlib.contextmanager
+def use_connection(conn=None):
+    """Make decorated calls inside the block share ``conn``.
+
+    Defaults to the connection already in use, else this thread's pooled
+    primary one. The block, not the decorated calls, owns its transaction
+    state.
+    """
+    if conn is None and _active_is_primary.get():
+        conn = _active_connection.get()
+    conn = conn or get_pool(replicas.router.primary).connection()
+    token = _active_connection.set(conn)
+    primary_token = _active_is_primary.set(True)
+    try:
+        yield conn
+    finally:
+        _active_is_primary.reset(primary_token)
+        _active_connection.reset(token)
+
+
+def _run(func, target, args, kwargs):
+    conn = get_pool(target).connection()
+    token = _active_connection.set(conn)
+    primary_token = _active_is_primary.set(target == replicas.router.primary)
+    try:
+        return func(conn, *args, **kwargs)
+    finally:
+        _active_is_primary.reset(primary_token)
+        _active_connection.reset(token)
+        if conn.in_transaction:
+            conn.rollback()
+
+
+def with_db_connection(func=None, *, writes=None):
+    """Decorator to handle database connections automatically.
+
+    Passes a pooled connection as the first argument. Functions that write
+    (``writes=True``, or wrapped by ``transactional``) get the primary;
+    others read from a replica chosen by ``replicas.router``, falling back
+    to the primary if the replica fails. Decorated functions called from
+    inside another decorated call share its connection, unless a write is
+    nested in a replica read. The outermost call rolls back anything left
+    uncommitted, as closing a fresh connection used to.
+    """
+    if func is None:
+        return functools.partial(with_db_connection, writes=writes)
+    if writes is None:
+        writes = getattr(func, "writes", False)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        router = replicas.router
+        if writes:
+            router.for_write()
+        conn = _active_connection.get()
+        if conn is not None and (_active_is_primary.get() or not writes):
+            return func(conn, *args, **kwargs)
+        if writes:
+            return _run(func, router.primary, args, kwargs)
+        target = router.for_read()
+        if target == router.primary:
+            return _run(func, target, args, kwargs)
+        try:
+            result = _run(func, target, args, kwargs)
+        except sqlite3.OperationalError:
+            # Missing, locked or stale replica: count it and read the primary.
+            router.report_failure(target)
+            return _run(func, router.primary, args, kwargs)
+        router.report_success(target)
+        return result
+    return wrapper
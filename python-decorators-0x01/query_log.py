@@ -0,0 +1,172 @@
+import atexit
+import functools
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import threading
+import time
+
+logger = logging.getLogger("queries")
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACES = re.compile(r"\s+")
+
+# Histogram bucket upper bounds in microseconds: 1us, 2us, 4us ... ~17s.
+BUCKETS_US = [2 ** exponent for exponent in range(25)]
+
+
+@functools.lru_cache(maxsize=4096)
+def fingerprint(query):
+    """Normalize a query so calls differing only in literals group together."""
+    query = _LITERALS.sub("?", query)
+    query = _IN_LISTS.sub("(?)", query)
+    return _SPACES.sub(" ", query).strip()
+
+
+class LatencyStats:
+    """Thread-safe per-fingerprint latency histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, key, duration_ns):
+        micros = duration_ns // 1000
+        bucket = min(micros.bit_length(), len(BUCKETS_US) - 1)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = [0, 0, 0, [0] * len(BUCKETS_US)]
+            stats[0] += 1
+            stats[1] += duration_ns
+            if duration_ns > stats[2]:
+                stats[2] = duration_ns
+            stats[3][bucket] += 1
+
+    def dump(self):
+        """Return count, mean/max and bucketed p50/p95/p99 (ms) per fingerprint."""
+        with self._lock:
+            snapshot = {key: (count, total, peak, list(buckets))
+                        for key, (count, total, peak, buckets) in self._stats.items()}
+        return {
+            key: {
+                "count": count,
+                "mean_ms": total / count / 1e6,
+                "max_ms": peak / 1e6,
+                "p50_ms": _percentile(buckets, count, 0.50),
+                "p95_ms": _percentile(buckets, count, 0.95),
+                "p99_ms": _percentile(buckets, count, 0.99),
+            }
+            for key, (count, total, peak, buckets) in snapshot.items()
+        }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+def _percentile(buckets, count, fraction):
+    """Upper bound (ms) of the bucket holding the given fraction of calls."""
+    target = fraction * count
+    seen = 0
+    for upper_us, hits in zip(BUCKETS_US, buckets):
+        seen += hits
+        if seen >= target:
+            return upper_us / 1000
+    return BUCKETS_US[-1] / 1000
+
+
+query_stats = LatencyStats()
+
+
+class JsonFormatter(logging.Formatter):
+    """Format query records as one JSON object per line."""
+
+    def format(self, record):
+        payload = dict(getattr(record, "query", {}), time=record.created, level=record.levelname)
+        return json.dumps(payload, default=str)
+
+
+_listener = None
+
+
+def start_query_logging(handler=None):
+    """Send query records through a queue to ``handler`` on a background thread.
+
+    The decorated call only enqueues the record; formatting and I/O happen
+    on the listener thread. Defaults to JSON lines on stdout.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+    if handler is None:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(JsonFormatter())
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    _listener = logging.handlers.QueueListener(log_queue, handler)
+    _listener.start()
+    atexit.register(stop_query_logging)
+    return _listener
+
+
+def stop_query_logging():
+    """Flush pending records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def log_queries(func=None, *, sample_rate=1.0, slow_ms=None, stats=query_stats):
+    """Decorator to log SQL queries as structured records.
+
+    Every call is timed into ``stats`` by query fingerprint. A record
+    (fingerprint, duration, rows, caller, error) is emitted for a
+    ``sample_rate`` fraction of calls, and always for calls slower than
+    ``slow_ms`` or that raise; the exception still propagates.
+    """
+    if func is None:
+        return functools.partial(log_queries, sample_rate=sample_rate, slow_ms=slow_ms, stats=stats)
+    slow_ns = None if slow_ms is None else slow_ms * 1e6
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Extract query from kwargs or args
+        query = kwargs.get('query', args[0] if args else None)
+        result = error = None
+        start = time.perf_counter_ns()
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            # Failed queries are timed and logged too, always.
+            duration = time.perf_counter_ns() - start
+            key = fingerprint(query) if isinstance(query, str) else repr(query)
+            if stats is not None:
+                stats.record(key, duration)
+            slow = slow_ns is not None and duration >= slow_ns
+            if error is not None or slow or (
+                sample_rate and (sample_rate >= 1 or random.random() < sample_rate)
+            ):
+                caller = sys._getframe(1)
+                level = logging.ERROR if error is not None else logging.WARNING if slow else logging.INFO
+                logger.log(level, "query", extra={"query": {
+                    "fingerprint": key,
+                    "duration_ms": duration / 1e6,
+                    "rows": len(result) if isinstance(result, (list, tuple)) else None,
+                    "caller": f"{caller.f_code.co_filename}:{caller.f_lineno} {caller.f_code.co_name}",
+                    "slow": slow,
+                    "error": None if error is None else f"{type(error).__name__}: {error}",
+                }})
+    return wrapper
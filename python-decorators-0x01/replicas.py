@@ -0,0 +1,136 @@
+import contextvars
+import itertools
+import os
+import sqlite3
+import threading
+import time
+
+# When the current thread/task last wrote, for read-your-writes stickiness.
+_last_write = contextvars.ContextVar("last_write", default=None)
+
+
+def is_read(query):
+    """Tell whether a statement only reads (and may go to a replica)."""
+    return query.lstrip().upper().startswith(("SELECT", "WITH", "PRAGMA"))
+
+
+def replica_uri(path):
+    """Read-only SQLite URI, so a missing replica fails instead of being created."""
+    return f"file:{path}?mode=ro"
+
+
+def make_local_replicas(primary, count=2):
+    """Simulate read replicas by copying the primary SQLite file.
+
+    Returns the replica paths. Call again to "replicate" newer writes.
+    """
+    base, ext = os.path.splitext(primary)
+    paths = [f"{base}.replica{number}{ext or '.db'}" for number in range(1, count + 1)]
+    source = sqlite3.connect(primary)
+    try:
+        for path in paths:
+            target = sqlite3.connect(path)
+            source.backup(target)
+            target.close()
+    finally:
+        source.close()
+    return paths
+
+
+class ReplicaRouter:
+    """Routes reads to healthy replicas and writes to the primary.
+
+    For ``sticky_window`` seconds after a thread or task writes, its reads
+    also go to the primary so it sees its own writes. A replica that fails
+    ``failure_threshold`` times in a row is evicted for
+    ``eviction_period`` seconds. All targets are SQLite URIs: open them
+    with ``uri=True``.
+    """
+
+    def __init__(self, primary, replicas=(), sticky_window=2.0,
+                 failure_threshold=3, eviction_period=30.0):
+        self.primary = primary
+        self.replicas = [replica_uri(path) for path in replicas]
+        self.sticky_window = sticky_window
+        self.failure_threshold = failure_threshold
+        self.eviction_period = eviction_period
+        self._failures = {}
+        self._evicted_until = {}
+        self._cycle = itertools.cycle(self.replicas)
+        self._lock = threading.Lock()
+        self.stats = {"reads": 0, "replica_reads": 0, "sticky_reads": 0, "writes": 0, "evictions": 0}
+
+    def for_write(self):
+        """Return the primary and start this context's read-your-writes window."""
+        _last_write.set(time.monotonic())
+        with self._lock:
+            self.stats["writes"] += 1
+        return self.primary
+
+    def for_read(self):
+        """Return a healthy replica, or the primary if sticky or none is healthy."""
+        last_write = _last_write.get()
+        with self._lock:
+            self.stats["reads"] += 1
+            if last_write is not None and time.monotonic() - last_write < self.sticky_window:
+                self.stats["sticky_reads"] += 1
+                return self.primary
+            now = time.monotonic()
+            for _ in range(len(self.replicas)):
+                replica = next(self._cycle)
+                if self._evicted_until.get(replica, 0) <= now:
+                    self.stats["replica_reads"] += 1
+                    return replica
+        return self.primary
+
+    def route(self, query):
+        """Pick the target for a single statement."""
+        return self.for_read() if is_read(query) else self.for_write()
+
+    def report_failure(self, target):
+        """Count a failure against a replica, evicting it past the threshold."""
+        if target == self.primary:
+            return
+        with self._lock:
+            failures = self._failures.get(target, 0) + 1
+            self._failures[target] = failures
+            if failures >= self.failure_threshold:
+                self._evicted_until[target] = time.monotonic() + self.eviction_period
+                self._failures[target] = 0
+                self.stats["evictions"] += 1
+
+    def report_success(self, target):
+        with self._lock:
+            self._failures.pop(target, None)
+
+    def check_replicas(self):
+        """Probe every replica with a trivial query and evict the broken ones."""
+        for replica in self.replicas:
+            try:
+                conn = sqlite3.connect(replica, uri=True)
+                try:
+                    conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+                finally:
+                    conn.close()
+            except sqlite3.Error:
+                for _ in range(self.failure_threshold):
+                    self.report_failure(replica)
+            else:
+                self.report_success(replica)
+                with self._lock:
+                    self._evicted_until.pop(replica, None)
+
+    def healthy_replicas(self):
+        now = time.monotonic()
+        with self._lock:
+            return [replica for replica in self.replicas if self._evicted_until.get(replica, 0) <= now]
+
+
+router = ReplicaRouter('users.db')
+
+
+def configure(primary='users.db', replicas=(), **options):
+    """Replace the shared router (see ReplicaRouter for ``options``)."""
+    global router
+    router = ReplicaRouter(primary, replicas, **options)
+    return router
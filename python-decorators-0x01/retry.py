@@ -0,0 +1,273 @@
+import asyncio
+import contextvars
+import functools
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+
+TRANSIENT_MESSAGES = ("locked", "busy", "disk i/o error", "unable to open database")
+
+# Absolute time.monotonic() deadline of the outermost retried call, if any.
+_deadline = contextvars.ContextVar("retry_deadline", default=None)
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the function while the breaker is open."""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when no attempt can start before the propagated deadline."""
+
+
+def is_transient(exc):
+    """Classify an error: True for hiccups worth retrying, False for permanent ones.
+
+    Locked/busy databases, dropped connections and timeouts are transient;
+    syntax, integrity and programming errors are permanent.
+    """
+    if isinstance(exc, (sqlite3.IntegrityError, sqlite3.ProgrammingError)):
+        return False
+    if isinstance(exc, sqlite3.OperationalError):
+        message = str(exc).lower()
+        return any(fragment in message for fragment in TRANSIENT_MESSAGES)
+    return isinstance(exc, (ConnectionError, TimeoutError))
+
+
+class RetryBudget:
+    """Token bucket capping retries to a fraction of calls.
+
+    Each call deposits ``ratio`` tokens and each retry spends one, with
+    ``min_per_second`` tokens added over time so idle clients can still
+    retry. Stops a fleet of clients from multiplying load during an outage.
+    """
+
+    def __init__(self, ratio=0.2, min_per_second=1.0, capacity=10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def withdraw(self):
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+
+class CircuitBreaker:
+    """Fails fast once the error rate over recent calls crosses a threshold.
+
+    Closed: calls run and outcomes are recorded over the last ``window``
+    calls. Open: calls raise CircuitOpenError for ``reset_timeout`` seconds.
+    Half-open: one trial call decides whether to close or reopen.
+    """
+
+    def __init__(self, failure_rate=0.5, window=20, min_calls=10, reset_timeout=30.0):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        self.stats = {"opened": 0, "rejected": 0}
+
+    def before_call(self):
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpenError("Circuit breaker is open")
+                self.state = "half-open"
+            if self.state == "half-open":
+                if self._trial_running:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpenError("Circuit breaker is half-open")
+                self._trial_running = True
+
+    def record(self, success):
+        with self._lock:
+            if self.state == "half-open":
+                self._trial_running = False
+                if success:
+                    self.state = "closed"
+                    self._outcomes.clear()
+                else:
+                    self._open()
+                return
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._open()
+
+    def cancel(self):
+        """Give back a half-open trial slot whose call never finished.
+
+        For calls interrupted by a BaseException (cancellation, Ctrl-C):
+        no outcome is recorded, so the next call becomes the trial.
+        """
+        with self._lock:
+            if self.state == "half-open":
+                self._trial_running = False
+
+    def _open(self):
+        self.state = "open"
+        self._opened_at = time.monotonic()
+        self.stats["opened"] += 1
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, a retry budget and deadlines."""
+
+    def __init__(self, attempts=3, base_delay=0.1, max_delay=5.0, multiplier=2.0,
+                 deadline=None, classify=is_transient, budget=None, breaker=None):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.deadline = deadline
+        self.classify = classify
+        self.budget = budget
+        self.breaker = breaker
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "retries": 0, "successes": 0, "failures": 0, "budget_exhausted": 0}
+
+    def backoff(self, attempt):
+        """Full jitter: a uniform delay up to the capped exponential backoff."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * self.multiplier ** attempt))
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _start(self):
+        """Count the call and return its effective deadline."""
+        self._count("calls")
+        if self.budget is not None:
+            self.budget.deposit()
+        inherited = _deadline.get()
+        own = None if self.deadline is None else time.monotonic() + self.deadline
+        if inherited is None:
+            return own
+        return inherited if own is None else min(inherited, own)
+
+    def _attempt(self, deadline):
+        if deadline is not None and time.monotonic() >= deadline:
+            raise DeadlineExceeded("Deadline passed before the call could start")
+        if self.breaker is not None:
+            self.breaker.before_call()
+
+    def _interrupted(self):
+        """Release the breaker after a BaseException escaped an attempt."""
+        if self.breaker is not None:
+            self.breaker.cancel()
+
+    def _outcome(self, exc):
+        """Record an attempt's outcome; return True if a retry may follow."""
+        transient = exc is not None and self.classify(exc)
+        if self.breaker is not None:
+            # Permanent errors are the caller's fault, not the server's.
+            self.breaker.record(exc is None or not transient)
+        if exc is None:
+            self._count("successes")
+        return transient
+
+    def _next_delay(self, attempt, deadline):
+        """Return the sleep before the next attempt, or None to give up."""
+        if attempt + 1 >= self.attempts:
+            return None
+        delay = self.backoff(attempt)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return None
+        if self.budget is not None and not self.budget.withdraw():
+            self._count("budget_exhausted")
+            return None
+        self._count("retries")
+        return delay
+
+    def __call__(self, func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                deadline = self._start()
+                token = _deadline.set(deadline)
+                try:
+                    attempt = 0
+                    while True:
+                        self._attempt(deadline)
+                        try:
+                            result = await func(*args, **kwargs)
+                        except Exception as exc:
+                            delay = self._next_delay(attempt, deadline) if self._outcome(exc) else None
+                            if delay is None:
+                                self._count("failures")
+                                raise
+                            await asyncio.sleep(delay)
+                            attempt += 1
+                            continue
+                        except BaseException:
+                            self._interrupted()
+                            raise
+                        self._outcome(None)
+                        return result
+                finally:
+                    _deadline.reset(token)
+            async_wrapper.policy = self
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            deadline = self._start()
+            token = _deadline.set(deadline)
+            try:
+                attempt = 0
+                while True:
+                    self._attempt(deadline)
+                    try:
+                        result = func(*args, **kwargs)
+                    except Exception as exc:
+                        delay = self._next_delay(attempt, deadline) if self._outcome(exc) else None
+                        if delay is None:
+                            self._count("failures")
+                            raise
+                        time.sleep(delay)
+                        attempt += 1
+                        continue
+                    except BaseException:
+                        self._interrupted()
+                        raise
+                    self._outcome(None)
+                    return result
+            finally:
+                _deadline.reset(token)
+        wrapper.policy = self
+        return wrapper
+
+
+def retry_on_failure(retries=3, delay=2, **options):
+    """Decorator to retry transient database failures with jittered backoff.
+
+    ``retries`` is the total number of attempts and ``delay`` the base
+    delay of the exponential backoff; see RetryPolicy
+    for ``max_delay``, ``deadline``, ``budget``, ``breaker`` and
+    ``classify``. Coroutine functions are awaited and back off with
+    ``asyncio.sleep``. Counters are on ``wrapper.policy.stats``.
+    """
+    return RetryPolicy(attempts=retries, base_delay=delay, **options)
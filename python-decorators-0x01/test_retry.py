@@ -0,0 +1,235 @@
+import asyncio
+import sqlite3
+import time
+import unittest
+from unittest import mock
+
+import retry
+from retry import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceeded,
+    RetryBudget,
+    RetryPolicy,
+    is_transient,
+    retry_on_failure,
+)
+
+LOCKED = sqlite3.OperationalError("database is locked")
+
+
+def flaky(failures, error=LOCKED):
+    """A function failing ``failures`` times with ``error``, then returning "ok"."""
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise error
+        return "ok"
+
+    func.calls = calls
+    return func
+
+
+class RetryTestCase(unittest.TestCase):
+    """Sleeps are recorded instead of taken; jitter picks its upper bound."""
+
+    def setUp(self):
+        sleep = mock.patch.object(retry.time, "sleep")
+        uniform = mock.patch.object(retry.random, "uniform", side_effect=lambda low, high: high)
+        self.sleep = sleep.start()
+        self.uniform = uniform.start()
+        self.addCleanup(sleep.stop)
+        self.addCleanup(uniform.stop)
+
+    def sleeps(self):
+        return [c.args[0] for c in self.sleep.call_args_list]
+
+
+class BackoffTests(RetryTestCase):
+    def test_full_jitter_bounds(self):
+        policy = RetryPolicy(base_delay=0.1, multiplier=2.0, max_delay=0.5)
+        self.assertEqual(
+            [round(policy.backoff(attempt), 6) for attempt in range(5)],
+            [0.1, 0.2, 0.4, 0.5, 0.5],
+        )
+        self.assertEqual({c.args[0] for c in self.uniform.call_args_list}, {0})
+
+    def test_sleeps_between_attempts(self):
+        func = RetryPolicy(attempts=4, base_delay=0.1)(flaky(3))
+        self.assertEqual(func(), "ok")
+        self.assertEqual([round(s, 6) for s in self.sleeps()], [0.1, 0.2, 0.4])
+
+
+class ClassificationTests(RetryTestCase):
+    def test_is_transient(self):
+        cases = [
+            (sqlite3.OperationalError("database is locked"), True),
+            (sqlite3.OperationalError("database table is busy"), True),
+            (sqlite3.OperationalError("unable to open database file"), True),
+            (ConnectionResetError(), True),
+            (TimeoutError(), True),
+            (sqlite3.OperationalError("no such table: users"), False),
+            (sqlite3.IntegrityError("UNIQUE constraint failed"), False),
+            (sqlite3.ProgrammingError("closed database"), False),
+            (ValueError("bad"), False),
+        ]
+        for exc, expected in cases:
+            with self.subTest(exc=exc):
+                self.assertIs(is_transient(exc), expected)
+
+    def test_permanent_error_is_not_retried(self):
+        func = RetryPolicy(attempts=5)(flaky(1, sqlite3.IntegrityError("dup")))
+        with self.assertRaises(sqlite3.IntegrityError):
+            func()
+        self.assertEqual(len(func.__wrapped__.calls), 1)
+        self.assertEqual(func.policy.stats["failures"], 1)
+
+
+class BudgetTests(RetryTestCase):
+    def test_exhausted_budget_stops_retries(self):
+        budget = RetryBudget(ratio=0.0, min_per_second=0.0, capacity=1.0)
+        func = RetryPolicy(attempts=5, budget=budget)(flaky(10))
+        with self.assertRaises(sqlite3.OperationalError):
+            func()
+        self.assertEqual(len(func.__wrapped__.calls), 2)
+        self.assertEqual(func.policy.stats["retries"], 1)
+        self.assertEqual(func.policy.stats["budget_exhausted"], 1)
+
+    def test_calls_refill_the_budget(self):
+        budget = RetryBudget(ratio=0.5, min_per_second=0.0, capacity=1.0)
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
+
+
+class DeadlineTests(RetryTestCase):
+    def test_nested_calls_inherit_the_deadline(self):
+        seen = []
+
+        @RetryPolicy(deadline=60)
+        def inner():
+            seen.append(retry._deadline.get())
+
+        @RetryPolicy(deadline=1)
+        def outer():
+            seen.append(retry._deadline.get())
+            inner()
+
+        before = time.monotonic()
+        outer()
+        self.assertEqual(seen[0], seen[1])
+        self.assertLessEqual(seen[0], before + 1 + 0.5)
+        self.assertIsNone(retry._deadline.get())
+
+    def test_no_retry_past_the_deadline(self):
+        func = RetryPolicy(attempts=5, base_delay=2, deadline=1)(flaky(10))
+        with self.assertRaises(sqlite3.OperationalError):
+            func()
+        self.assertEqual(len(func.__wrapped__.calls), 1)
+        self.assertEqual(self.sleeps(), [])
+
+    def test_nested_call_after_the_deadline(self):
+        @RetryPolicy()
+        def inner():
+            return "never"
+
+        @RetryPolicy(deadline=0.01)
+        def outer():
+            end = time.monotonic() + 0.02
+            while time.monotonic() < end:  # time.sleep is patched out
+                pass
+            return inner()
+
+        with self.assertRaises(DeadlineExceeded):
+            outer()
+
+
+class RetryOnFailureTests(RetryTestCase):
+    def test_positional_and_keyword_arguments(self):
+        for decorator in (retry_on_failure(3, 1), retry_on_failure(retries=3, delay=1)):
+            with self.subTest(decorator=decorator):
+                self.sleep.reset_mock()
+                func = decorator(flaky(2))
+                self.assertEqual(func(), "ok")
+                self.assertEqual(len(func.__wrapped__.calls), 3)
+                self.assertEqual(self.sleeps(), [1, 2])
+
+    def test_gives_up_after_retries_attempts(self):
+        func = retry_on_failure(retries=3, delay=1)(flaky(10))
+        with self.assertRaises(sqlite3.OperationalError):
+            func()
+        self.assertEqual(len(func.__wrapped__.calls), 3)
+
+    def test_coroutines(self):
+        async def fails_once():
+            fails_once.calls += 1
+            if fails_once.calls == 1:
+                raise LOCKED
+            return "ok"
+
+        fails_once.calls = 0
+        func = retry_on_failure(retries=2, delay=1)(fails_once)
+        with mock.patch.object(retry.asyncio, "sleep", mock.AsyncMock()) as sleep:
+            self.assertEqual(asyncio.run(func()), "ok")
+        sleep.assert_awaited_once_with(1)
+
+
+class CircuitBreakerTrialTests(unittest.TestCase):
+    """An interrupted half-open trial must not wedge the breaker."""
+
+    def half_open_breaker(self):
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=0.01)
+        breaker.record(False)
+        self.assertEqual(breaker.state, "open")
+        time.sleep(0.02)
+        return breaker
+
+    def test_cancelled_async_trial_frees_the_slot(self):
+        breaker = self.half_open_breaker()
+        started = asyncio.Event()
+
+        @RetryPolicy(attempts=1, breaker=breaker)
+        async def trial():
+            started.set()
+            await asyncio.sleep(60)
+
+        @RetryPolicy(attempts=1, breaker=breaker)
+        async def healthy():
+            return "ok"
+
+        async def scenario():
+            task = asyncio.create_task(trial())
+            await started.wait()
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return await healthy()
+
+        self.assertEqual(asyncio.run(scenario()), "ok")
+        self.assertEqual(breaker.state, "closed")
+
+    def test_interrupted_sync_trial_frees_the_slot(self):
+        breaker = self.half_open_breaker()
+
+        @RetryPolicy(attempts=1, breaker=breaker)
+        def trial():
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            trial()
+        self.assertEqual(breaker.state, "half-open")
+        breaker.before_call()  # the slot is free for the next trial
+
+    def test_second_caller_rejected_while_trial_runs(self):
+        breaker = self.half_open_breaker()
+        breaker.before_call()
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+
+if __name__ == "__main__":
+    unittest.main()
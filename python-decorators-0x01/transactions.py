@@ -0,0 +1,132 @@
+import contextlib
+import contextvars
+import functools
+import time
+from caching import query_cache, written_tables
+from db import use_connection
+
+# Open group-commit scope and transactional nesting depth for this thread/task.
+_scope = contextvars.ContextVar("group_commit_scope", default=None)
+_depth = contextvars.ContextVar("transaction_depth", default=0)
+
+
+class GroupCommit:
+    """Batches the commits of many transactional calls on one connection."""
+
+    def __init__(self, conn, max_writes, max_delay):
+        self.conn = conn
+        self.max_writes = max_writes
+        self.max_delay = max_delay
+        self.pending = 0
+        self.first_write_at = None
+        self.written = set()
+        self.stats = {"writes": 0, "commits": 0, "rollbacks": 0}
+
+    def begin(self):
+        """Open the shared transaction if the last commit closed it."""
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN")
+
+    def wrote(self):
+        """Count a finished write and commit once the batch is full or old."""
+        self.pending += 1
+        self.stats["writes"] += 1
+        now = time.monotonic()
+        if self.first_write_at is None:
+            self.first_write_at = now
+        if self.pending >= self.max_writes or now - self.first_write_at >= self.max_delay:
+            self.commit()
+
+    def commit(self):
+        if self.conn.in_transaction:
+            self.conn.commit()
+            self.stats["commits"] += 1
+        query_cache.invalidate_tables(self.written)
+        self.pending = 0
+        self.first_write_at = None
+        self.written = set()
+
+
+@contextlib.contextmanager
+def group_commit(conn=None, max_writes=1000, max_delay=0.05):
+    """Batch the commits of transactional calls made inside the block.
+
+    Each decorated call still runs in its own savepoint, so a failing call
+    rolls back only its own writes. The batch commits after ``max_writes``
+    calls or once its oldest write is ``max_delay`` seconds old (checked
+    as writes arrive), and when the block exits. A write acknowledged
+    inside the block is durable only after that commit.
+    """
+    with use_connection(conn) as conn:
+        scope = GroupCommit(conn, max_writes, max_delay)
+        token = _scope.set(scope)
+        conn.set_trace_callback(lambda statement: scope.written.update(written_tables(statement)))
+        try:
+            yield scope
+        finally:
+            _scope.reset(token)
+            try:
+                scope.commit()
+            finally:
+                conn.set_trace_callback(None)
+
+
+def _in_savepoint(conn, depth, func, args, kwargs):
+    name = f"transactional_{depth}"
+    conn.execute(f"SAVEPOINT {name}")
+    token = _depth.set(depth + 1)
+    try:
+        result = func(conn, *args, **kwargs)
+    except Exception:
+        conn.execute(f"ROLLBACK TO {name}")
+        conn.execute(f"RELEASE {name}")
+        raise
+    finally:
+        _depth.reset(token)
+    conn.execute(f"RELEASE {name}")
+    return result
+
+
+def transactional(func):
+    """Decorator to manage database transactions.
+
+    A top-level call commits on success and rolls back on error. Calls
+    nested inside another transactional call, or made inside a
+    ``group_commit`` block, run in a savepoint instead. Tables written
+    are evicted from ``query_cache`` once the data commits. Under
+    ``with_db_connection`` the call always runs on the primary database.
+    """
+    @functools.wraps(func)
+    def wrapper(conn, *args, **kwargs):
+        scope = _scope.get()
+        depth = _depth.get()
+        if depth:
+            return _in_savepoint(conn, depth, func, args, kwargs)
+        if scope is not None and scope.conn is conn:
+            scope.begin()
+            try:
+                result = _in_savepoint(conn, depth, func, args, kwargs)
+            except Exception:
+                scope.stats["rollbacks"] += 1
+                raise
+            scope.wrote()
+            return result
+
+        written = set()
+        conn.set_trace_callback(lambda statement: written.update(written_tables(statement)))
+        token = _depth.set(1)
+        try:
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            result = func(conn, *args, **kwargs)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+        finally:
+            _depth.reset(token)
+            conn.set_trace_callback(None)
+        query_cache.invalidate_tables(written)
+        return result
+    wrapper.writes = True  # with_db_connection sends it to the primary
+    return wrapper
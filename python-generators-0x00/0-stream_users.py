@@ -1,15 +1,28 @@
 import mysql.connector
-from seed import connect_to_prodev
+from seed import prodev_connection, select_list, stream_cursor
 
-def stream_users():
-    connection = connect_to_prodev()
-    if connection:
-        try:
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM user_data")
-            for row in cursor:
-                yield row
-            cursor.close()
-            connection.close()
-        except mysql.connector.Error as err:
-            print(f"Error streaming data: {err}")
+DEFAULT_CHUNK_SIZE = 1000
+
+def stream_users(chunk_size=DEFAULT_CHUNK_SIZE, columns=None, connection=None):
+    """Generator that streams rows from user_data one by one.
+
+    Uses an unbuffered cursor and pulls ``chunk_size`` rows at a time, so
+    memory stays flat regardless of table size. ``columns`` limits the
+    projection. Without a ``connection`` one is checked out of the shared
+    pool for the life of the generator.
+    """
+    with prodev_connection(connection) as connection:
+        if connection:
+            try:
+                cursor = stream_cursor(connection)
+                cursor.execute(f"SELECT {select_list(columns)} FROM user_data")
+                names = [description[0] for description in cursor.description]
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield dict(zip(names, row))
+                cursor.close()
+            except mysql.connector.Error as err:
+                print(f"Error streaming data: {err}")
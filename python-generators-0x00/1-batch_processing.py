@@ -1,28 +1,60 @@
+import collections
+import concurrent.futures
+import os
 import mysql.connector
-from seed import connect_to_prodev
+from seed import prodev_connection, select_list, stream_cursor, where_clause
 
-def stream_users_in_batches(batch_size):
-    """Generator function to fetch rows from user_data table in batches using yield."""
-    connection = connect_to_prodev()
-    try:
-        if connection:
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM user_data")
-            while True:
-                rows = cursor.fetchmany(batch_size)
-                if not rows:
-                    break
-                return rows
-            cursor.close()
-            connection.close()
-        else:
-            print("Failed to connect to database")
-    except mysql.connector.Error as err:
-        print(f"Error streaming batches: {err}")
+def stream_users_in_batches(batch_size, columns=None, predicates=None, connection=None):
+    """Generator function to fetch rows from user_data table in batches using yield.
+
+    ``predicates`` is a list of ``(column, operator, value)`` filters pushed
+    down into the SQL WHERE clause. Without a ``connection`` one is checked
+    out of the shared pool for the life of the generator.
+    """
+    with prodev_connection(connection) as connection:
+        try:
+            if connection:
+                where, params = where_clause(connection, predicates)
+                cursor = stream_cursor(connection)
+                cursor.execute(f"SELECT {select_list(columns)} FROM user_data{where}", params)
+                names = [description[0] for description in cursor.description]
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield [dict(zip(names, row)) for row in rows]
+                cursor.close()
+            else:
+                print("Failed to connect to database")
+        except mysql.connector.Error as err:
+            print(f"Error streaming batches: {err}")
+
+def process_batches(batches, func, workers=None, executor="process", max_in_flight=None):
+    """Apply ``func`` to each batch concurrently, yielding results in order.
+
+    ``executor`` is ``"process"`` (for CPU-bound work; ``func`` must be
+    picklable) or ``"thread"``; ``workers`` defaults to the CPU count. At
+    most ``max_in_flight`` batches (default twice the worker count) are
+    submitted ahead of the consumer, so a slow consumer applies
+    backpressure to the database read.
+    """
+    pools = {
+        "process": concurrent.futures.ProcessPoolExecutor,
+        "thread": concurrent.futures.ThreadPoolExecutor,
+    }
+    workers = workers or os.cpu_count() or 1
+    limit = max_in_flight or 2 * workers
+    with pools[executor](max_workers=workers) as pool:
+        pending = collections.deque()
+        for batch in batches:
+            if len(pending) >= limit:
+                yield pending.popleft().result()
+            pending.append(pool.submit(func, batch))
+        while pending:
+            yield pending.popleft().result()
 
 def batch_processing(batch_size):
     """Process batches from stream_users_in_batches and filter users over age 25."""
-    for batch in stream_users_in_batches(batch_size):
+    for batch in stream_users_in_batches(batch_size, predicates=[("age", ">", 25)]):
         for user in batch:
-            if user['age'] > 25:
-                print(user)
+            print(user)
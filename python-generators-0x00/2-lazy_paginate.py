@@ -1,18 +1,60 @@
-from seed import connect_to_prodev
-
-def paginate_users(page_size, offset):
-    connection = connect_to_prodev()
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute(f"SELECT * FROM user_data LIMIT {page_size} OFFSET {offset}")
-    rows = cursor.fetchall()
-    connection.close()
+import base64
+from seed import placeholder, prodev_connection, select_list
+
+def paginate_users(page_size, offset, connection=None):
+    """Fetch one page with LIMIT/OFFSET (cost grows with the offset)."""
+    with prodev_connection(connection) as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            f"SELECT {select_list()} FROM user_data ORDER BY user_id LIMIT {int(page_size)} OFFSET {int(offset)}"
+        )
+        names = [description[0] for description in cursor.description]
+        rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+        cursor.close()
+        return rows
+
+def seek_users(connection, page_size, after=None):
+    """Fetch the page of users whose user_id sorts after ``after``.
+
+    Seeks on the user_data primary key, so every page costs the same
+    index range scan no matter how deep it is.
+    """
+    cursor = connection.cursor()
+    query = f"SELECT {select_list()} FROM user_data"
+    params = ()
+    if after is not None:
+        query += f" WHERE user_id > {placeholder(connection)}"
+        params = (after,)
+    cursor.execute(f"{query} ORDER BY user_id LIMIT {int(page_size)}", params)
+    names = [description[0] for description in cursor.description]
+    rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+    cursor.close()
     return rows
 
-def lazy_paginate(page_size):
-    offset = 0
-    while True:
-        page = paginate_users(page_size, offset)
-        if not page:
-            break
-        yield page
-        offset += page_size
+def encode_cursor(user_id):
+    """Encode a user_id as an opaque, URL-safe resume token."""
+    return base64.urlsafe_b64encode(str(user_id).encode()).decode()
+
+def decode_cursor(token):
+    """Decode a resume token produced by encode_cursor."""
+    return base64.urlsafe_b64decode(token.encode()).decode()
+
+def page_cursor(page):
+    """Return the resume token pointing just past the given page."""
+    return encode_cursor(page[-1]["user_id"]) if page else None
+
+def lazy_paginate(page_size, cursor=None, connection=None):
+    """Generator yielding pages of users via keyset pagination.
+
+    One connection, checked out of the shared pool unless ``connection`` is
+    given, is reused for every page. Pass the ``page_cursor`` of the last
+    page consumed as ``cursor`` to resume where a previous run stopped.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    with prodev_connection(connection) as connection:
+        while True:
+            page = seek_users(connection, page_size, after)
+            if not page:
+                break
+            yield page
+            after = page[-1]["user_id"]
@@ -1,26 +1,22 @@
 import mysql.connector
-from seed import connect_to_prodev
+from aggregates import stream_summary
+from seed import prodev_connection
 
-def stream_user_ages():
-    connection = connect_to_prodev()
-    if connection:
-        try:
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute("SELECT age FROM user_data")
-            for row in cursor:
-                yield row['age']
-            cursor.close()
-            connection.close()
-        except mysql.connector.Error as err:
-            print(f"Error streaming ages: {err}")
+def stream_user_ages(connection=None):
+    with prodev_connection(connection) as connection:
+        if connection:
+            try:
+                cursor = connection.cursor(dictionary=True)
+                cursor.execute("SELECT age FROM user_data")
+                for row in cursor:
+                    yield row['age']
+                cursor.close()
+            except mysql.connector.Error as err:
+                print(f"Error streaming ages: {err}")
 
 def calculate_average_age():
-    total_age = 0
-    count = 0
-    for age in stream_user_ages():
-        total_age += age
-        count += 1
-    average_age = total_age / count if count > 0 else 0
+    """Print the average age, reduced chunk by chunk with NumPy."""
+    average_age = stream_summary().average
     print(f"Average age of users: {average_age:.2f}")
 
 if __name__ == "__main__":
@@ -0,0 +1,130 @@
+"""Aggregate statistics over user_data.age.
+
+Two engines share one result type:
+
+- ``sql_summary``/``sql_histogram``/``sql_group_counts`` push the work down
+  to the database and move only the answer over the wire.
+- ``stream_summary`` pulls fixed-size chunks of ages into NumPy arrays and
+  reduces each one vectorized into a mergeable ``AgeSummary``, so memory is
+  bounded by the chunk size and the number of distinct ages.
+
+Ages are whole years, so ``AgeSummary`` keeps an exact value->count table
+instead of an approximate sketch: percentiles are exact, and partial
+summaries (per chunk, per process, per shard) merge by adding counts.
+"""
+import numpy as np
+from seed import prodev_connection, select_list, stream_cursor
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+class AgeSummary:
+    """Mergeable summary of a stream of ages."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = None
+        self.counts = {}
+
+    @classmethod
+    def from_array(cls, ages):
+        """Summarize one chunk of ages with vectorized NumPy reductions."""
+        summary = cls()
+        if ages.size:
+            values, counts = np.unique(ages, return_counts=True)
+            summary.count = int(ages.size)
+            summary.total = int(ages.sum())
+            summary.minimum = int(values[0])
+            summary.maximum = int(values[-1])
+            summary.counts = dict(zip(values.tolist(), counts.tolist()))
+        return summary
+
+    def merge(self, other):
+        """Fold another partial summary into this one and return self."""
+        if not other.count:
+            return self
+        self.count += other.count
+        self.total += other.total
+        self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+        self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+        for value, count in other.counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+        return self
+
+    @property
+    def average(self):
+        return self.total / self.count if self.count else 0
+
+    def percentiles(self, qs):
+        """Return the exact (nearest-rank) percentile for each q in 0..100."""
+        if not self.count:
+            return [None for _ in qs]
+        values = np.array(sorted(self.counts))
+        cumulative = np.cumsum([self.counts[value] for value in values])
+        ranks = np.ceil(np.asarray(qs, dtype=float) / 100 * self.count).clip(1, self.count)
+        return values[np.searchsorted(cumulative, ranks)].tolist()
+
+    def histogram(self, bin_width=10):
+        """Return ``{bin_start: count}`` for bins of ``bin_width`` years."""
+        bins = {}
+        for value, count in self.counts.items():
+            start = value // bin_width * bin_width
+            bins[start] = bins.get(start, 0) + count
+        return dict(sorted(bins.items()))
+
+
+def age_chunks(connection, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield user_data ages as int64 NumPy arrays of up to chunk_size rows."""
+    cursor = stream_cursor(connection)
+    cursor.execute("SELECT age FROM user_data")
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    cursor.close()
+
+
+def stream_summary(connection=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Summarize all ages chunk by chunk with bounded memory."""
+    with prodev_connection(connection) as connection:
+        summary = AgeSummary()
+        # None when the database is unreachable (prodev_connection printed
+        # why); the summary is then empty and averages to 0.
+        if connection:
+            for ages in age_chunks(connection, chunk_size):
+                summary.merge(AgeSummary.from_array(ages))
+        return summary
+
+
+def sql_summary(connection):
+    """Return count, average, min and max age computed by the database."""
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(age), AVG(age), MIN(age), MAX(age) FROM user_data")
+    count, average, minimum, maximum = cursor.fetchone()
+    cursor.close()
+    return {"count": count, "average": float(average or 0), "min": minimum, "max": maximum}
+
+
+def sql_histogram(connection, bin_width=10):
+    """Return ``{bin_start: count}`` grouped by the database."""
+    width = int(bin_width)
+    cursor = connection.cursor()
+    cursor.execute(
+        f"SELECT age - age % {width} AS bin, COUNT(*) FROM user_data GROUP BY bin ORDER BY bin"
+    )
+    bins = {int(start): count for start, count in cursor.fetchall()}
+    cursor.close()
+    return bins
+
+
+def sql_group_counts(connection, column="age"):
+    """Return ``{value: count}`` for a user_data column grouped by the database."""
+    select_list((column,))
+    cursor = connection.cursor()
+    cursor.execute(f"SELECT {column}, COUNT(*) FROM user_data GROUP BY {column} ORDER BY {column}")
+    counts = dict(cursor.fetchall())
+    cursor.close()
+    return counts
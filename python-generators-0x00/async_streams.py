@@ -0,0 +1,141 @@
+"""Async counterparts of the user_data generators.
+
+Each helper is an async generator over an async DB-API driver: aiomysql
+for ALX_prodev, or an aiosqlite connection (e.g. a SQLite stand-in) passed
+in as ``connection``. With ``prefetch`` enabled the next batch is already
+being fetched while the consumer works on the current one, so a single
+event loop can drive many concurrent streams without a thread per stream.
+
+Wrap a stream in ``contextlib.aclosing`` if you may stop iterating early,
+so its cursor is closed before the connection is.
+"""
+import asyncio
+import contextlib
+from seed import PRODEV_CONFIG, placeholder, select_list, where_clause
+
+decode_cursor = __import__('2-lazy_paginate').decode_cursor
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+async def open_prodev_async():
+    """Open an aiomysql connection to ALX_prodev."""
+    import aiomysql
+
+    config = dict(PRODEV_CONFIG)
+    config["db"] = config.pop("database")
+    return await aiomysql.connect(**config)
+
+
+@contextlib.asynccontextmanager
+async def async_connection(connection=None):
+    """Yield ``connection`` if given, else a new ALX_prodev connection closed on exit."""
+    if connection is not None:
+        yield connection
+        return
+    connection = await open_prodev_async()
+    try:
+        yield connection
+    finally:
+        connection.close()
+
+
+async def open_cursor(connection):
+    """Open an unbuffered cursor (SSCursor on aiomysql)."""
+    if type(connection).__module__.startswith("aiomysql"):
+        import aiomysql
+
+        return await connection.cursor(aiomysql.SSCursor)
+    return await connection.cursor()
+
+
+async def fetch_batches(cursor, batch_size, prefetch=True):
+    """Yield ``fetchmany`` batches, fetching the next one ahead if asked."""
+    pending = asyncio.ensure_future(cursor.fetchmany(batch_size))
+    try:
+        while True:
+            rows = await pending
+            pending = None
+            if not rows:
+                return
+            if prefetch:
+                pending = asyncio.ensure_future(cursor.fetchmany(batch_size))
+            yield rows
+            if pending is None:
+                pending = asyncio.ensure_future(cursor.fetchmany(batch_size))
+    finally:
+        if pending is not None:
+            with contextlib.suppress(Exception):
+                await pending
+
+
+async def stream_users_in_batches(batch_size, columns=None, predicates=None, connection=None, prefetch=True):
+    """Async generator yielding lists of user dicts, batch_size at a time."""
+    async with async_connection(connection) as connection:
+        where, params = where_clause(connection, predicates)
+        cursor = await open_cursor(connection)
+        try:
+            await cursor.execute(f"SELECT {select_list(columns)} FROM user_data{where}", params)
+            names = [description[0] for description in cursor.description]
+            async for rows in fetch_batches(cursor, batch_size, prefetch):
+                yield [dict(zip(names, row)) for row in rows]
+        finally:
+            await cursor.close()
+
+
+async def stream_users(chunk_size=DEFAULT_CHUNK_SIZE, columns=None, connection=None, prefetch=True):
+    """Async generator yielding user dicts one by one."""
+    async for batch in stream_users_in_batches(chunk_size, columns, connection=connection, prefetch=prefetch):
+        for row in batch:
+            yield row
+
+
+async def stream_user_ages(chunk_size=DEFAULT_CHUNK_SIZE, connection=None, prefetch=True):
+    """Async generator yielding every user's age."""
+    async for batch in stream_users_in_batches(chunk_size, ("age",), connection=connection, prefetch=prefetch):
+        for row in batch:
+            yield row["age"]
+
+
+async def seek_users(connection, page_size, after=None):
+    """Fetch the keyset page of users whose user_id sorts after ``after``."""
+    query = f"SELECT {select_list()} FROM user_data"
+    params = ()
+    if after is not None:
+        query += f" WHERE user_id > {placeholder(connection)}"
+        params = (after,)
+    cursor = await connection.cursor()
+    try:
+        await cursor.execute(f"{query} ORDER BY user_id LIMIT {int(page_size)}", params)
+        names = [description[0] for description in cursor.description]
+        return [dict(zip(names, row)) for row in await cursor.fetchall()]
+    finally:
+        await cursor.close()
+
+
+async def lazy_paginate(page_size, cursor=None, connection=None, prefetch=True):
+    """Async generator yielding keyset pages of users.
+
+    ``cursor`` is a ``page_cursor`` token to resume from, as in the sync
+    version. Because the next page only depends on the last key of the
+    current one, it is requested before the current page is handed to the
+    consumer.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    async with async_connection(connection) as connection:
+        pending = asyncio.ensure_future(seek_users(connection, page_size, after))
+        try:
+            while True:
+                page = await pending
+                pending = None
+                if not page:
+                    return
+                if prefetch:
+                    pending = asyncio.ensure_future(seek_users(connection, page_size, page[-1]["user_id"]))
+                yield page
+                if pending is None:
+                    pending = asyncio.ensure_future(seek_users(connection, page_size, page[-1]["user_id"]))
+        finally:
+            if pending is not None:
+                with contextlib.suppress(Exception):
+                    await pending
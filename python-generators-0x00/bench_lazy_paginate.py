@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Benchmark LIMIT/OFFSET against keyset pagination at increasing depths.
+
+Times fetching a single page at each depth with both strategies over one
+reused connection. Uses a seeded SQLite stand-in by default; pass --mysql
+to read ALX_prodev instead.
+
+    python3 bench_lazy_paginate.py --rows 1000000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import seed
+
+lazy_paginate = __import__('2-lazy_paginate')
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def key_before(connection, offset):
+    """Return the user_id just before ``offset`` (setup only, not timed)."""
+    if offset == 0:
+        return None
+    cursor = connection.cursor()
+    cursor.execute(f"SELECT user_id FROM user_data ORDER BY user_id LIMIT 1 OFFSET {offset - 1}")
+    (user_id,) = cursor.fetchone()
+    cursor.close()
+    return user_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--mysql", action="store_true", help="read ALX_prodev.user_data")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.mysql:
+            connection = seed.connect_to_prodev()
+        else:
+            path = os.path.join(tmp, "user_data.sqlite3")
+            seed.create_sqlite_standin(path, args.rows).close()
+            connection = sqlite3.connect(path)
+
+        print(f"{'depth':>10}{'offset ms':>12}{'keyset ms':>12}")
+        depths = [0] + [10 ** exp for exp in range(3, 9) if 10 ** exp < args.rows]
+        for depth in depths + [args.rows - args.page_size]:
+            after = key_before(connection, depth)
+            offset = best_of(args.repeat, lambda: lazy_paginate.paginate_users(args.page_size, depth, connection))
+            keyset = best_of(args.repeat, lambda: lazy_paginate.seek_users(connection, args.page_size, after))
+            print(f"{depth:>10}{offset * 1000:>12.2f}{keyset * 1000:>12.2f}")
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
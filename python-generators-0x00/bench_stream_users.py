@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Benchmark buffered vs streaming reads of user_data.
+
+Reports peak RSS and rows/sec for each mode. Each mode runs in its own
+process so peak RSS is not shared between runs. Uses a seeded SQLite
+stand-in by default; pass --mysql to read ALX_prodev instead.
+
+    python3 bench_stream_users.py --rows 1000000
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sqlite3
+import tempfile
+import time
+
+import seed
+
+stream_users = __import__('0-stream_users').stream_users
+
+
+def open_connection(args):
+    if args.mysql:
+        return seed.connect_to_prodev()
+    return sqlite3.connect(args.db)
+
+
+def run_buffered(connection, args):
+    cursor = connection.cursor()
+    cursor.execute("SELECT * FROM user_data")
+    return sum(1 for _ in cursor.fetchall())
+
+
+def run_stream(connection, args):
+    return sum(1 for _ in stream_users(chunk_size=args.chunk_size, connection=connection))
+
+
+def run_projected(connection, args):
+    rows = stream_users(chunk_size=args.chunk_size, columns=("user_id", "age"), connection=connection)
+    return sum(1 for _ in rows)
+
+
+MODES = {
+    "buffered": run_buffered,
+    "stream": run_stream,
+    "stream+projection": run_projected,
+}
+
+
+def measure(mode, args, results):
+    connection = open_connection(args)
+    start = time.perf_counter()
+    count = MODES[mode](connection, args)
+    elapsed = time.perf_counter() - start
+    connection.close()
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((mode, count, elapsed, peak_kb))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--mysql", action="store_true", help="read ALX_prodev.user_data")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        args.db = os.path.join(tmp, "user_data.sqlite3")
+        if not args.mysql:
+            seed.create_sqlite_standin(args.db, args.rows).close()
+
+        results = multiprocessing.Queue()
+        print(f"{'mode':<20}{'rows':>10}{'seconds':>10}{'rows/sec':>12}{'peak RSS MB':>14}")
+        for mode in MODES:
+            process = multiprocessing.Process(target=measure, args=(mode, args, results))
+            process.start()
+            mode, count, elapsed, peak_kb = results.get()
+            process.join()
+            print(f"{mode:<20}{count:>10}{elapsed:>10.2f}{count / elapsed:>12.0f}{peak_kb / 1024:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
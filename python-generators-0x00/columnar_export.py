@@ -0,0 +1,89 @@
+"""Columnar export of user_data to Parquet or Arrow IPC files.
+
+``export_users`` converts the batch stream from ``stream_users_in_batches``
+into Arrow record batches and writes them incrementally, buffering at most
+one row group, so memory stays constant however large the table is.
+``read_columns``/``scan_columns`` let later jobs read ages or emails back
+through a memory map without touching MySQL.
+"""
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+stream_users_in_batches = __import__('1-batch_processing').stream_users_in_batches
+
+USER_SCHEMA = pa.schema([
+    ("user_id", pa.string()),
+    ("name", pa.string()),
+    ("email", pa.string()),
+    ("age", pa.int32()),
+])
+
+DEFAULT_ROW_GROUP_SIZE = 128 * 1024
+
+
+def to_record_batch(rows, schema=USER_SCHEMA):
+    """Convert a list of user dicts into an Arrow record batch."""
+    columns = [
+        [int(row[field.name]) for row in rows] if pa.types.is_integer(field.type)
+        else [row[field.name] for row in rows]
+        for field in schema
+    ]
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def export_users(path, format="parquet", row_group_size=DEFAULT_ROW_GROUP_SIZE,
+                 batches=None, compression="snappy"):
+    """Write user_data to ``path`` as Parquet or Arrow IPC ("arrow").
+
+    Rows are buffered until ``row_group_size`` of them are ready and then
+    written as one row group (Parquet) or record batch (Arrow). ``batches``
+    defaults to ``stream_users_in_batches``. Returns the number of rows.
+    """
+    if batches is None:
+        batches = stream_users_in_batches(row_group_size)
+    if format == "parquet":
+        writer = pq.ParquetWriter(path, USER_SCHEMA, compression=compression)
+        write = writer.write_table
+    elif format == "arrow":
+        writer = ipc.new_file(path, USER_SCHEMA)
+        write = writer.write_table
+    else:
+        raise ValueError(f"Unsupported format: {format}")
+
+    pending, pending_rows, total = [], 0, 0
+    try:
+        for rows in batches:
+            pending.append(to_record_batch(rows))
+            pending_rows += len(rows)
+            while pending_rows >= row_group_size:
+                table = pa.Table.from_batches(pending, USER_SCHEMA)
+                write(table.slice(0, row_group_size), row_group_size)
+                pending = table.slice(row_group_size).to_batches()
+                pending_rows -= row_group_size
+                total += row_group_size
+        if pending_rows:
+            write(pa.Table.from_batches(pending, USER_SCHEMA), row_group_size)
+            total += pending_rows
+    finally:
+        writer.close()
+    return total
+
+
+def read_columns(path, columns=("age",)):
+    """Read selected columns as an Arrow table through a memory map."""
+    if path.endswith(".parquet"):
+        return pq.read_table(path, columns=list(columns), memory_map=True)
+    with pa.memory_map(path) as source:
+        return ipc.open_file(source).read_all().select(list(columns))
+
+
+def scan_columns(path, columns=("age",), batch_size=DEFAULT_ROW_GROUP_SIZE):
+    """Yield record batches of selected columns without loading the whole file."""
+    if path.endswith(".parquet"):
+        yield from pq.ParquetFile(path, memory_map=True).iter_batches(batch_size, columns=list(columns))
+        return
+    with pa.memory_map(path) as source:
+        reader = ipc.open_file(source)
+        for index in range(reader.num_record_batches):
+            yield reader.get_batch(index).select(list(columns))
@@ -0,0 +1,151 @@
+"""A small thread-safe DB-API connection pool.
+
+Connections are checked out with a context manager, health-checked before
+being handed out, recycled once they exceed ``max_lifetime`` seconds and
+reset (unread results drained, open transaction rolled back) when checked
+back in. Wait time and checkout counts are recorded for monitoring.
+"""
+import contextlib
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the checkout timeout."""
+
+
+def ping(connection):
+    """Default health check: ping (reconnecting) or run a trivial query."""
+    if hasattr(connection, "ping"):
+        connection.ping(reconnect=True, attempts=1)
+        return
+    cursor = connection.cursor()
+    cursor.execute("SELECT 1")
+    cursor.fetchall()
+    cursor.close()
+
+
+def reset(connection):
+    """Return a connection to a clean state before it goes back in the pool."""
+    if getattr(connection, "unread_result", False):
+        connection.consume_results()
+    connection.rollback()
+
+
+class ConnectionPool:
+    """Pool of up to ``size`` connections created by ``factory``."""
+
+    def __init__(self, factory, size=5, max_lifetime=3600, timeout=30,
+                 health_check=ping):
+        self.factory = factory
+        self.size = size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.health_check = health_check
+        self._idle = []
+        self._open = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "created": 0,
+            "discarded": 0,
+            "timeouts": 0,
+            "wait_total": 0.0,
+            "wait_max": 0.0,
+        }
+
+    @contextlib.contextmanager
+    def connection(self, timeout=None):
+        """Check out a connection for the duration of the ``with`` block."""
+        connection, created_at = self._acquire(self.timeout if timeout is None else timeout)
+        try:
+            yield connection
+        finally:
+            self._release(connection, created_at)
+
+    def stats(self):
+        """Return a snapshot of pool counters, including current usage."""
+        with self._condition:
+            stats = dict(self._stats)
+            stats["open"] = self._open
+            stats["idle"] = len(self._idle)
+        stats["wait_avg"] = stats["wait_total"] / stats["checkouts"] if stats["checkouts"] else 0.0
+        return stats
+
+    def close(self):
+        """Close every idle connection; checked-out ones close on return."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._condition.notify_all()
+        for connection, _ in idle:
+            connection.close()
+
+    def _acquire(self, timeout):
+        start = time.perf_counter()
+        deadline = start + timeout
+        with self._condition:
+            while not self._idle and self._open >= self.size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(f"No connection available after {timeout}s")
+            if self._idle:
+                connection, created_at = self._idle.pop()
+            else:
+                connection, created_at = None, None
+                self._open += 1
+            waited = time.perf_counter() - start
+            self._stats["checkouts"] += 1
+            self._stats["wait_total"] += waited
+            self._stats["wait_max"] = max(self._stats["wait_max"], waited)
+
+        try:
+            if connection is not None and not self._usable(connection, created_at):
+                self._discard(connection)
+                connection = None
+            if connection is None:
+                connection, created_at = self.factory(), time.monotonic()
+                with self._condition:
+                    self._stats["created"] += 1
+        except BaseException:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+        return connection, created_at
+
+    def _usable(self, connection, created_at):
+        if time.monotonic() - created_at > self.max_lifetime:
+            return False
+        try:
+            self.health_check(connection)
+        except Exception:
+            return False
+        return True
+
+    def _release(self, connection, created_at):
+        try:
+            reset(connection)
+            healthy = True
+        except Exception:
+            healthy = False
+        with self._condition:
+            keep = healthy and not self._closed
+            if keep:
+                self._idle.append((connection, created_at))
+            else:
+                self._open -= 1
+            self._condition.notify()
+        if not keep:
+            self._discard(connection)
+
+    def _discard(self, connection):
+        with self._condition:
+            self._stats["discarded"] += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
@@ -1,7 +1,28 @@
+import contextlib
 import mysql.connector
 import csv
+import hashlib
+import itertools
+import random
+import sqlite3
+import threading
+import time
 import uuid
 
+from pool import ConnectionPool
+
+USER_COLUMNS = ("user_id", "name", "email", "age")
+
+PRODEV_CONFIG = {
+    "host": "localhost",
+    "user": "root",
+    "password": "root",
+    "database": "ALX_prodev",
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
 def connect_db():
     try:
         connection = mysql.connector.connect(
@@ -22,19 +43,126 @@ def create_database(connection):
     except mysql.connector.Error as err:
         print(f"Error creating database: {err}")
 
+def open_prodev():
+    """Open a new ALX_prodev connection, raising mysql.connector.Error on failure."""
+    return mysql.connector.connect(**PRODEV_CONFIG)
+
 def connect_to_prodev():
     try:
-        connection = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="root",
-            database="ALX_prodev"
-        )
-        return connection
+        return open_prodev()
     except mysql.connector.Error as err:
         print(f"Error connecting to ALX_prodev: {err}")
         return None
 
+def configure_pool(factory=open_prodev, **options):
+    """Replace the shared connection pool used by the streaming helpers.
+
+    ``options`` are passed to ConnectionPool (size, max_lifetime, timeout,
+    health_check). Pass a different ``factory`` to pool another database,
+    e.g. a SQLite stand-in opened with ``check_same_thread=False``.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = ConnectionPool(factory, **options)
+        return _pool
+
+def get_pool():
+    """Return the shared pool, creating it with default options on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(open_prodev)
+        return _pool
+
+@contextlib.contextmanager
+def prodev_connection(connection=None):
+    """Yield ``connection`` if given, else check one out of the shared pool.
+
+    Yields None (after printing the error) if the database is unreachable,
+    so callers keep their ``if connection:`` checks.
+    """
+    if connection is not None:
+        yield connection
+        return
+    with contextlib.ExitStack() as stack:
+        try:
+            connection = stack.enter_context(get_pool().connection())
+        except mysql.connector.Error as err:
+            print(f"Error connecting to ALX_prodev: {err}")
+        yield connection
+
+def select_list(columns=None):
+    """Build a validated column list for SELECTs on user_data."""
+    if not columns:
+        return ", ".join(USER_COLUMNS)
+    unknown = [column for column in columns if column not in USER_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown user_data columns: {', '.join(unknown)}")
+    return ", ".join(columns)
+
+PREDICATE_OPERATORS = ("=", "!=", "<", "<=", ">", ">=")
+
+def where_clause(connection, predicates=None):
+    """Build a WHERE clause from ``(column, operator, value)`` predicates.
+
+    Columns and operators are validated, values are bound as parameters.
+    Returns the SQL fragment (empty when there are no predicates) and params.
+    """
+    if not predicates:
+        return "", ()
+    conditions = []
+    params = []
+    for column, operator, value in predicates:
+        select_list((column,))
+        if operator not in PREDICATE_OPERATORS:
+            raise ValueError(f"Unsupported operator: {operator}")
+        conditions.append(f"{column} {operator} {placeholder(connection)}")
+        params.append(value)
+    return " WHERE " + " AND ".join(conditions), tuple(params)
+
+def is_sqlite(connection):
+    """Tell whether a (sync or aiosqlite) connection talks to SQLite."""
+    return type(connection).__module__.split(".")[0] in ("sqlite3", "aiosqlite")
+
+def placeholder(connection):
+    """Return the bind-parameter marker used by the connection's driver."""
+    return "?" if is_sqlite(connection) else "%s"
+
+def stream_cursor(connection):
+    """Open an unbuffered cursor so rows stay on the server until fetched.
+
+    mysql.connector takes ``buffered=False``; DB-API drivers without that
+    option (e.g. the sqlite3 stand-in) already fetch lazily.
+    """
+    try:
+        return connection.cursor(buffered=False)
+    except TypeError:
+        return connection.cursor()
+
+def create_sqlite_standin(path, rows):
+    """Create and seed a SQLite copy of user_data for local benchmarks."""
+    connection = sqlite3.connect(path)
+    connection.execute("DROP TABLE IF EXISTS user_data")
+    connection.execute("""
+        CREATE TABLE user_data (
+            user_id VARCHAR(36) PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NOT NULL UNIQUE,
+            age DECIMAL NOT NULL
+        )
+    """)
+    connection.executemany(
+        "INSERT INTO user_data (user_id, name, email, age) VALUES (?, ?, ?, ?)",
+        (
+            (str(uuid.uuid4()), f"user{i}", f"user{i}@example.com", random.randint(18, 100))
+            for i in range(rows)
+        ),
+    )
+    connection.commit()
+    return connection
+
 def create_table(connection):
     try:
         cursor = connection.cursor()
@@ -44,27 +172,142 @@ def create_table(connection):
                 name VARCHAR(255) NOT NULL,
                 email VARCHAR(255) NOT NULL,
                 age DECIMAL NOT NULL,
-                INDEX idx_user_id (user_id)
+                INDEX idx_user_id (user_id),
+                UNIQUE KEY uq_user_data_email (email)
             )
         """)
+        ensure_unique_email(cursor)
         print("Table user_data created successfully")
         cursor.close()
     except mysql.connector.Error as err:
         print(f"Error creating table: {err}")
 
-def insert_data(connection, data):
+def ensure_unique_email(cursor):
+    """Add the unique email key to a user_data table created without it.
+
+    insert_data skips rows already loaded through this key: tables seeded
+    by older loaders hold random uuid4 user_ids, so the primary key alone
+    would let a re-run insert every row again. If the table already holds
+    duplicate emails the key cannot be added; drop and re-seed it then.
+    """
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = 'user_data'
+          AND column_name = 'email' AND non_unique = 0
+    """)
+    if cursor.fetchone()[0]:
+        return
+    try:
+        cursor.execute("ALTER TABLE user_data ADD UNIQUE KEY uq_user_data_email (email)")
+    except mysql.connector.Error as err:
+        print(f"Cannot make user_data.email unique, drop and re-seed user_data: {err}")
+
+def user_key(email):
+    """Derive a stable user_id from an email so re-seeding skips duplicates.
+
+    Matches the UUID-formatted MD5 built by the LOAD DATA path in SQL.
+    """
+    return str(uuid.UUID(hashlib.md5(email.encode()).hexdigest()))
+
+def load_data_infile(connection, data):
+    """Bulk-load the CSV server-side with LOAD DATA LOCAL INFILE.
+
+    Needs a connection opened with ``allow_local_infile=True`` and a server
+    with ``local_infile`` enabled; raises mysql.connector.Error otherwise.
+    """
+    cursor = connection.cursor()
+    cursor.execute("""
+        LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE user_data
+        FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+        LINES TERMINATED BY '\\n'
+        IGNORE 1 LINES
+        (name, email, age)
+        SET user_id = INSERT(INSERT(INSERT(INSERT(MD5(email), 21, 0, '-'), 17, 0, '-'), 13, 0, '-'), 9, 0, '-')
+    """, (data,))
+    inserted = cursor.rowcount
+    connection.commit()
+    cursor.close()
+    return inserted
+
+def is_number(value):
+    """Tell whether a CSV field holds a number, e.g. an age."""
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+def insert_data(connection, data, batch_size=1000, commit_every=10000, use_load_data=False, report=print):
+    """Stream user_data.csv into user_data in multi-row batches.
+
+    Rows are read ``batch_size`` at a time and sent with a single
+    executemany, committing every ``commit_every`` rows. Rows already
+    present (same email, enforced by the unique key create_table adds)
+    are skipped, so re-running is idempotent.
+    Malformed rows (wrong field count, empty name or email, non-numeric
+    age) are reported and skipped.
+    With ``use_load_data`` the whole file goes through LOAD DATA LOCAL
+    INFILE, falling back to batches if the server refuses. Progress and
+    throughput are passed to ``report``; returns the number of new rows.
+    """
+    if use_load_data and not is_sqlite(connection):
+        try:
+            inserted = load_data_infile(connection, data)
+            report(f"Loaded {inserted} rows with LOAD DATA LOCAL INFILE")
+            return inserted
+        except mysql.connector.Error as err:
+            report(f"LOAD DATA LOCAL INFILE unavailable ({err}), inserting in batches")
+
+    ignore = "OR IGNORE" if is_sqlite(connection) else "IGNORE"
+    marker = placeholder(connection)
+    statement = (
+        f"INSERT {ignore} INTO user_data (user_id, name, email, age) "
+        f"VALUES ({marker}, {marker}, {marker}, {marker})"
+    )
+    inserted = read = uncommitted = skipped = 0
+    start = time.perf_counter()
+
+    def valid_rows(csv_reader):
+        """Yield (name, email, age) rows, reporting and skipping malformed ones."""
+        nonlocal skipped
+        for row in csv_reader:
+            if not any(field.strip() for field in row):
+                continue  # blank line
+            if len(row) == 3 and row[0].strip() and row[1].strip() and is_number(row[2]):
+                yield row
+            else:
+                skipped += 1
+                report(f"Skipping malformed row on line {csv_reader.line_num}: {row!r}")
+
     try:
         cursor = connection.cursor()
-        with open(data, 'r') as file:
+        with open(data, 'r', newline='') as file:
             csv_reader = csv.reader(file)
-            next(csv_reader)  # Skip header
-            for row in csv_reader:
-                user_id = str(uuid.uuid4())
-                cursor.execute("""
-                    INSERT INTO user_data (user_id, name, email, age)
-                    VALUES (%s, %s, %s, %s)
-                """, (user_id, row[0], row[1], row[2]))
+            next(csv_reader, None)  # Skip header
+            rows = valid_rows(csv_reader)
+            while True:
+                batch = [
+                    (user_key(email), name, email, age)
+                    for name, email, age in itertools.islice(rows, batch_size)
+                ]
+                if not batch:
+                    break
+                cursor.executemany(statement, batch)
+                inserted += max(cursor.rowcount, 0)
+                read += len(batch)
+                uncommitted += len(batch)
+                if uncommitted >= commit_every:
+                    connection.commit()
+                    uncommitted = 0
+                    elapsed = time.perf_counter() - start
+                    report(f"Read {read} rows, inserted {inserted} ({read / elapsed:.0f} rows/sec)")
             connection.commit()
         cursor.close()
     except mysql.connector.Error as err:
         print(f"Error inserting data: {err}")
+    elapsed = time.perf_counter() - start
+    report(
+        f"Done: read {read} rows, inserted {inserted}, skipped {skipped} malformed "
+        f"in {elapsed:.2f}s ({read / max(elapsed, 1e-9):.0f} rows/sec)"
+    )
+    return inserted